@@ -0,0 +1,110 @@
+"""
+    python -m benchmarks.edit_distance
+
+    checks src.logic.edit_distance against a plain dynamic programming reference on typo pairs built
+    from the word corpus, then times it against the difflib scorer it replaced
+"""
+import random
+import time
+from difflib import ndiff
+
+from src.logic.corpus import load_corpus
+from src.logic.edit_distance import distance, banded_distance, bit_parallel_distance, batch_distance, similarity
+
+
+def ndiff_levenshtein_distance(str_1, str_2):
+    # the difflib based scorer used before src.logic.edit_distance
+    distance = 0
+    buffer_removed = buffer_added = 0
+    for x in ndiff(str_1, str_2):
+        code = x[0]
+
+        if code == ' ':
+            distance += max(buffer_removed, buffer_added)
+            buffer_removed = buffer_added = 0
+        elif code == '-':
+            buffer_removed += 1
+        elif code == '+':
+            buffer_added += 1
+
+    distance += max(buffer_removed, buffer_added)
+
+    return 1 - distance / max(len(str_1), len(str_2))
+
+
+def reference_distance(a: str, b: str) -> int:
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        curr = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + (a[i - 1] != b[j - 1]))
+        prev = curr
+
+    return prev[-1]
+
+
+def make_typo(word: str, rng: random.Random, alphabet: str) -> str:
+    chars = list(word)
+    for _ in range(rng.randint(0, 3)):
+        op = rng.randrange(3)
+        pos = rng.randint(0, len(chars))
+        if op == 0:
+            chars.insert(pos, rng.choice(alphabet))
+        elif op == 1 and pos < len(chars):
+            chars.pop(pos)
+        elif pos < len(chars):
+            chars[pos] = rng.choice(alphabet)
+
+    return ''.join(chars)
+
+
+def make_pairs(count: int, seed: int = 0) -> list[tuple[str, str]]:
+    rng = random.Random(seed)
+    corpus = load_corpus('russian')
+    alphabet = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+    pairs = []
+    for _ in range(count):
+        word = corpus.word(rng.randrange(len(corpus)))
+        pairs.append((word, make_typo(word, rng, alphabet)))
+
+    # long targets take the banded path, empty strings the edge cases
+    for _ in range(count // 100):
+        word = ' '.join(corpus.word(rng.randrange(len(corpus))) for _ in range(15))
+        pairs.append((word, make_typo(word, rng, alphabet)))
+    pairs += [('', ''), ('', 'абв'), ('абв', '')]
+
+    return pairs
+
+
+def timed(name: str, func, pairs) -> None:
+    start = time.perf_counter()
+    func(pairs)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<24} {elapsed * 1000:>9.1f} ms  {elapsed / len(pairs) * 1e6:>7.2f} us/pair')
+
+
+def main():
+    pairs = make_pairs(20_000)
+
+    expected = [reference_distance(a, b) for a, b in pairs]
+    assert [distance(a, b) for a, b in pairs] == expected
+    assert [banded_distance(a, b) for a, b in pairs] == expected
+    assert [bit_parallel_distance(a, b) for a, b in pairs] == expected
+    assert batch_distance(pairs) == expected
+    print(f'{len(pairs)} pairs: identical to the reference')
+
+    scored = [(a, b) for a, b in pairs if a or b]
+    differ = sum(abs(ndiff_levenshtein_distance(a, b) - similarity(a, b)) > 1e-9 for a, b in scored)
+    print(f'difflib scorer disagrees with true levenshtein on {differ} of {len(scored)} pairs')
+
+    timed('difflib (old)', lambda p: [ndiff_levenshtein_distance(a, b) for a, b in p], scored)
+    timed('reference dp', lambda p: [reference_distance(a, b) for a, b in p], scored)
+    timed('banded dp', lambda p: [banded_distance(a, b) for a, b in p], scored)
+    timed('bit-parallel', lambda p: [bit_parallel_distance(a, b) for a, b in p], scored)
+    timed('similarity', lambda p: [similarity(a, b) for a, b in p], scored)
+    timed('batch_distance', batch_distance, scored)
+
+
+if __name__ == '__main__':
+    main()
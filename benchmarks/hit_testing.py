@@ -0,0 +1,116 @@
+"""
+    python -m benchmarks.hit_testing
+
+    builds a grid of thousands of widgets in a hidden window, checks that the spatial index of the root
+    presses the same widgets as the linear scan over children it replaced, then times both
+"""
+import random
+import time
+
+import moderngl as mgl
+import pygame as pg
+
+from src.interface.gui import GUI
+from src.interface.layouts.anchorlayout import AnchorLayout
+from src.interface.layouts.floatlayout import FloatLayout
+from src.interface.layouts.linelayout import LineLayout
+from src.interface.widgets.gui_object import GUIObject
+from src.interface.widgets.root import Root
+
+SIZE = (1200, 720)
+
+
+class Grid(Root):
+    def __init__(self, ctx, rows: int, columns: int, seed: int = 0):
+        self.rows, self.columns = rows, columns
+        self.rng = random.Random(seed)
+
+        super().__init__(ctx, 'grid')
+
+    def build(self) -> None:
+        rng = self.rng
+
+        al = AnchorLayout(parent=self, pressable=True)
+        ll = LineLayout(parent=al, size_hint=(0.95, 0.95), id='ll')
+
+        for _ in range(self.rows):
+            row = LineLayout(parent=ll, orientation='horizontal', pressable=rng.random() < 0.3)
+            for _ in range(self.columns):
+                cell = LineLayout(parent=row, padding=2, pressable=rng.random() < 0.5)
+                for _ in range(3):
+                    GUIObject(parent=cell, pressable=rng.random() < 0.6)
+
+            # free widgets that stick out of their layout
+            fl = FloatLayout(parent=ll, pressable=True)
+            for _ in range(4):
+                GUIObject(parent=fl, size=(60, 20), pos=(rng.randint(-20, SIZE[0]), rng.randint(-5, 30)),
+                          pressable=True)
+
+
+def walked_window_pos(widget) -> tuple[float, float]:
+    # GUIObject.window_pos before the spatial index, a walk up the parents
+    parent_pos = widget.parent.window_pos if widget.parent is widget.root else walked_window_pos(widget.parent)
+    return parent_pos[0] + widget.pos[0], parent_pos[1] + widget.pos[1]
+
+
+def linear_press(widget, pos):
+    # GUILayout.mouse_down before the spatial index, every child tried with cords_in_rect
+    if hasattr(widget, '_widgets'):
+        for child in widget._widgets:
+            child_pos = walked_window_pos(child)
+            if all(0 < pos[i] - child_pos[i] < child.size[i] for i in (0, 1)):
+                pressed = linear_press(child, pos)
+                if pressed is not None:
+                    return pressed
+
+    return widget if widget.pressable else None
+
+
+def index_press(root: Root, pos):
+    return next((widget for widget in root.spatial_index.hits(pos) if widget.pressable), None)
+
+
+def timed(name: str, func, points) -> None:
+    start = time.perf_counter()
+    for point in points:
+        func(point)
+    elapsed = time.perf_counter() - start
+    print(f'{name:<24} {elapsed * 1000:>9.1f} ms  {elapsed / len(points) * 1e6:>8.2f} us/press')
+
+
+def main():
+    pg.init()
+    pg.display.set_mode(SIZE, flags=pg.OPENGL | pg.DOUBLEBUF | pg.HIDDEN)
+    ctx = mgl.create_context()
+
+    GUI(ctx)
+    root = Grid(ctx, rows=40, columns=30)
+    root.use()
+    root.update_layout()
+
+    rng = random.Random(1)
+    points = [(rng.uniform(0, SIZE[0]), rng.uniform(0, SIZE[1])) for _ in range(5_000)]
+
+    start = time.perf_counter()
+    root.spatial_index.hits((0, 0))
+    print(f'{len(root.spatial_index._widgets)} widgets, index built in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+    assert [linear_press(root.widget, p) for p in points] == [index_press(root, p) for p in points]
+
+    # a moved row is placed again with its subtree only
+    row = root.widget.ll._widgets[10]
+    row.pos = (row.pos[0] + 25, row.pos[1] + 7)
+    assert [linear_press(root.widget, p) for p in points] == [index_press(root, p) for p in points]
+    print(f'{len(points)} presses: identical to the linear scan, '
+          f'{root.spatial_index.rebuilds} rebuilds, {root.spatial_index.updates} subtree updates')
+
+    timed('linear scan (old)', lambda p: linear_press(root.widget, p), points)
+    timed('spatial index', lambda p: index_press(root, p), points)
+
+    widgets = [root.widget.ll._widgets[i]._widgets[j] for i in range(0, 80, 2) for j in range(30)]
+    timed('window_pos walk (old)', lambda p: [walked_window_pos(w) for w in widgets[:10]], points)
+    timed('window_pos cached', lambda p: [w.window_pos for w in widgets[:10]], points)
+
+
+if __name__ == '__main__':
+    main()
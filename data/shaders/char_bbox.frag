@@ -0,0 +1,20 @@
+# version 330
+
+in vec2 uv;
+flat in vec2 w_size;
+
+out vec4 fragColor;
+
+void main() {
+    float opacity = 0.1;
+
+    int width = 2;
+
+    opacity += step(uv.x, width / w_size.x);
+    opacity += step(uv.y, width / w_size.y);
+
+    opacity += step(1 - uv.x, width / w_size.x);
+    opacity += step(1 - uv.y, width / w_size.y);
+
+    fragColor = vec4 (opacity);
+}
\ No newline at end of file
@@ -0,0 +1,19 @@
+# version 330
+
+in vec2 in_texture_cords;
+
+// per char instance
+in vec4 in_rect;
+
+out vec2 uv;
+flat out vec2 w_size;
+
+uniform vec2 fb_size;
+
+void main() {
+    uv = in_texture_cords;
+    w_size = in_rect.zw;
+
+    vec2 position = (in_rect.xy + in_texture_cords * in_rect.zw) * 2 / fb_size - 1;
+    gl_Position = vec4 (position, 0, 1);
+}
\ No newline at end of file
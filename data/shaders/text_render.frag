@@ -6,10 +6,17 @@ in vec3 color;
 out vec4 fragColor;
 
 uniform sampler2D symbol;
+uniform bool distance_field;
 
 void main() {
     float opacity = texture(symbol, uv).x;
 
+    if (distance_field) {
+        // 0.5 is the outline, the edge is smoothed over about one screen pixel at any scale
+        float width = max(fwidth(opacity) * 0.7, 1e-4);
+        opacity = smoothstep(0.5 - width, 0.5 + width, opacity);
+    }
+
 //    float A = 4., s = 1./A, x, y;
 //
 //    for (x=-.5; x<.5; x+=s) for (y=-.5; y<.5; y+=s) opacity += texture(symbol, uv + vec2(x * 0.05, y * 0.05)).x * (1 - x + y);
@@ -1,15 +1,31 @@
 # version 330
 
-in vec2 in_position;
 in vec2 in_texture_cords;
+
+// per char instance
+in vec4 in_rect;
+in vec4 in_uv_rect;
+in float in_page;
 in vec3 in_color;
+in uint in_state;
 
 out vec2 uv;
 out vec3 color;
 
+uniform vec2 fb_size;
+uniform float page;
+uniform vec3 palette[15];
+
 void main() {
-    uv = in_texture_cords;
-    color = in_color;
+    // chars from other atlas pages are drawn by another call
+    if (in_page != page) {
+        gl_Position = vec4 (2, 2, 2, 1);
+        return;
+    }
+
+    uv = in_uv_rect.xy + in_texture_cords * in_uv_rect.zw;
+    color = in_state == 0u ? in_color : palette[in_state - 1u];
 
-    gl_Position = vec4 (in_position, 0, 1);
+    vec2 position = (in_rect.xy + in_texture_cords * in_rect.zw) * 2 / fb_size - 1;
+    gl_Position = vec4 (position, 0, 1);
 }
\ No newline at end of file
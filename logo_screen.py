@@ -1,24 +1,34 @@
 from src.interface.layouts.anchorlayout import AnchorLayout
 from src.interface.layouts.linelayout import LineLayout
+from src.interface.misc.font_manager import FontManager
 from src.interface.misc.mglmanagers import ProgramManager
 from src.interface.widgets.root import Root
 from src.interface.widgets.text_line import TextLine
-from src.interface.widgets.text_render import Font
 
 
 class Logo(Root):
     def __init__(self, ctx):
         super().__init__(ctx, 'logo')
 
+        self._open_main = False
+
     def build(self) -> None:
         def on_press():
-            self.gui.main.use()
+            self._open_main = True
 
         al = AnchorLayout(parent=self, pressable=True, press_func=on_press)
 
         LineLayout(parent=al, size_hint=(1, 1), program=ProgramManager(self.ctx).get('background_fog'), id='backgorund')
 
         char_size = 100
-        font = Font(name='Inkfree', char_size=char_size)
+        font = FontManager(self.ctx).get('Inkfree', char_size, sdf=True)
 
         TextLine(parent=al, line='TypingGame', font=font, id='textfield')
+
+    def draw(self) -> None:
+        # the main screen opens once the glyphs of its text are rasterized
+        if self._open_main and self.gui.glyphs_ready:
+            self._open_main = False
+            self.gui.main.use()
+
+        super().draw()
@@ -1,3 +1,14 @@
+import string
+import sys
+
+from src.settings import W_SIZE, FPS, LIVE_RESIZE, STARTUP_BUDGET_MS
+from src.profiling import StartupProfiler
+
+# started before the heavy imports below so they show up in the report
+profiler = StartupProfiler(STARTUP_BUDGET_MS) if '--profile-startup' in sys.argv else None
+if profiler is not None:
+    profiler.start()
+
 import pygame as pg
 import moderngl as mgl
 from structlinks.LinkedList import LinkedList
@@ -6,12 +17,13 @@ from logo_screen import Logo
 from main_screen import MainScreen
 from result_screen import Results
 from src.interface.gui import GUI
+from src.interface.widgets.text_render import Font
+from src.logic.corpus import load_corpus
 from src.logic.event_handler import EventHandler
-from src.settings import W_SIZE, FPS
 
 
 class Window:
-    def __init__(self, size=(1000, 600), fps=60):
+    def __init__(self, size=(1000, 600), fps=60, live_resize=False):
         # SETTING PYGAME TO WORK WITH OPENGL
         self.display = pg.display.set_mode(size, flags=pg.OPENGL | pg.DOUBLEBUF | pg.RESIZABLE)
         pg.display.gl_set_attribute(pg.GL_CONTEXT_MAJOR_VERSION, 3)
@@ -32,18 +44,20 @@ class Window:
         self.clock = pg.time.Clock()
 
         # EVENT HANDLER
-        self.event_handler = EventHandler(self)
+        self.event_handler = EventHandler(self, live_resize)
 
         # GUI
         self.gui = GUI(self.ctx)
 
-        Logo(self.ctx).use()
         MainScreen(self.ctx)
         Results(self.ctx)
 
-        self.gui.build()
+        # only the logo is built here, the other screens are built right after the first frame
+        Logo(self.ctx).use()
+
+    def run(self, profiler: StartupProfiler | None = None):
+        first_frame = True
 
-    def run(self):
         fps_buffer_size = 10
         fps_buffer = LinkedList([0 for _ in range(fps_buffer_size)])
         self.summ = 0
@@ -52,6 +66,7 @@ class Window:
             self.ctx.clear()
 
             self.event_handler.handle_events()
+            self.event_handler.apply_resize()
             self.gui.animation_manager.update(pg.time.get_ticks())
             self.gui.draw()
 
@@ -62,14 +77,25 @@ class Window:
 
             pg.display.flip()
 
+            if first_frame:
+                first_frame = False
+
+                if profiler is not None:
+                    profiler.first_frame()
+                    print(profiler.report())
+
+                self.gui.build()
+                self.gui.prewarm_glyphs(Font.active(),
+                                        load_corpus('russian').charset() | set(string.digits + string.punctuation))
+
             self.clock.tick(self.fps)
 
 
 def main():
     pg.init()
 
-    w = Window(W_SIZE, FPS)
-    w.run()
+    w = Window(W_SIZE, FPS, LIVE_RESIZE)
+    w.run(profiler)
 
 
 if __name__ == '__main__':
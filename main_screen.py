@@ -4,6 +4,7 @@ from dataclasses import dataclass
 
 import pygame as pg
 
+from src.interface.misc.font_manager import FontManager
 from src.interface.misc.mglmanagers import TextureManager, ProgramManager
 from src.interface.widgets.gui_object import GUIObject
 from src.interface.widgets.root import Root
@@ -14,7 +15,13 @@ from src.interface.widgets.text_line import TextLine
 from src.interface.widgets.text_input import TextInput
 from src.interface.misc.animation_manager import Animation
 from src.logic.text_generator import TextGenerator
-from src.logic.levenshtein_distance import levenshtein_distance
+from src.logic.line_queue import LineQueue
+from src.logic.word_matcher import WordMatcher
+from src.settings import MISTAKE_BOOST
+
+# states of words in the playing line, indexes into its palette
+TARGET, CORRECT, WRONG, MISTYPED = 1, 2, 3, 4
+WORD_PALETTE = ((0.8, 0.8, 0.8), (0, 1, 0), (1, 0, 0), (0.8, 0, 0))
 
 
 class MainScreen(Root):
@@ -32,6 +39,13 @@ class MainScreen(Root):
         self.current_word_num = 0
         self.is_game_on = False
 
+        # typed text of the current word against its target, fed by Input on every key
+        self.word_matcher = WordMatcher('')
+        self._word_is_wrong = False
+
+        # adaptive mode: weight multiplier for mistyped words, None turns it off
+        self.mistake_boost: float | None = MISTAKE_BOOST
+
     @property
     def is_game_on(self) -> bool:
         return self._is_game_on
@@ -45,7 +59,7 @@ class MainScreen(Root):
     def build(self) -> None:
 
         char_size = 30
-        font = Font(name='CascadiaMono', char_size=char_size)
+        font = FontManager(self.ctx).get('CascadiaMono', char_size)
 
         al = AnchorLayout(parent=self)
 
@@ -63,7 +77,7 @@ class MainScreen(Root):
         text_view_layout = LineLayout(parent=ll, size=(None, int(char_size * 3)), padding=0, spacing=0,
                                       orientation='vertical', id='text_view_ll', resize_func=text_view_resize)
         # ----[
-        PlayingLine(parent=text_view_layout, font=font, id='current_line')
+        PlayingLine(parent=text_view_layout, font=font, id='current_line', palette=WORD_PALETTE)
         GeneratedLine(parent=text_view_layout, font=font, id='next_line')
         # ]----
 
@@ -78,15 +92,18 @@ class MainScreen(Root):
 
             # оценка слова на правильность
             if input_word != '' and input_word.lower() == current_word_data.word:
-                color = (0, 1, 0)
+                state = CORRECT
                 self.correct_words_count += 1
                 self.wpm_data += 1
             else:
-                color = (1, 0, 0)
+                state = WRONG
                 self.wrong_words_count += 1
-                ld = levenshtein_distance(current_word_data.word, input_word)
-                self.wpm_data += ld
-            current_line.set_color(i=slice(current_word_data.start, current_word_data.end), color=color)
+                self.word_matcher.sync(input_word)
+                self.wpm_data += self.word_matcher.similarity
+
+                if self.mistake_boost is not None:
+                    self.gui.main.central_ll.text_view_ll.next_line.boost(current_word_data.word, self.mistake_boost)
+            current_line.set_state(i=slice(current_word_data.start, current_word_data.end), state=state)
 
             # пропуск строки
             self.current_word_num += 1
@@ -95,7 +112,8 @@ class MainScreen(Root):
 
             # выделение целевого слова
             current_word_data = current_line.words_data[self.current_word_num]
-            current_line.set_color(i=slice(current_word_data.start, current_word_data.end), color=(0.8, 0.8, 0.8))
+            current_line.set_state(i=slice(current_word_data.start, current_word_data.end), state=TARGET)
+            self._set_target_word(current_word_data.word)
 
         Timer(parent=input_layout, font=font, line='0:00', size=(int(char_size * 4), int(char_size * 1.5)), id='timer')
 
@@ -106,11 +124,13 @@ class MainScreen(Root):
             current_line = self.gui.main.central_ll.text_view_ll.current_line
             current_word_data = current_line.words_data[self.current_word_num]
 
-            # выделение неправильно вводимого слова
-            if not current_word_data.word.startswith(input_word):
-                current_line.set_color(i=slice(current_word_data.start, current_word_data.end), color=(0.8, 0, 0))
-            else:
-                current_line.set_color(i=slice(current_word_data.start, current_word_data.end), color=(0.8, 0.8, 0.8))
+            self.word_matcher.sync(input_word)
+
+            # выделение неправильно вводимого слова, только если состояние слова изменилось
+            if self._word_is_wrong != (not self.word_matcher.is_prefix):
+                self._word_is_wrong = not self._word_is_wrong
+                state = MISTYPED if self._word_is_wrong else TARGET
+                current_line.set_state(i=slice(current_word_data.start, current_word_data.end), state=state)
 
         Input(parent=input_layout, size=(None, int(char_size * 1.5)), font=font,
               id='input_line', pressable=True, validate_func=input_validation, keyboard_press_func=input_key_press)
@@ -122,6 +142,10 @@ class MainScreen(Root):
         # ]--
         # ]
 
+    def _set_target_word(self, word: str) -> None:
+        self.word_matcher = WordMatcher(word)
+        self._word_is_wrong = False
+
     def skip_line(self):
         self.current_word_num = 0
         text_view_ll = self.gui.main.central_ll.text_view_ll
@@ -145,7 +169,8 @@ class MainScreen(Root):
             self.is_game_on = False
 
             current_word_data = current_line.words_data[self.current_word_num]
-            current_line.set_color(i=slice(current_word_data.start, current_word_data.end), color=(0.8, 0.8, 0.8))
+            current_line.set_state(i=slice(current_word_data.start, current_word_data.end), state=TARGET)
+            self._set_target_word(current_word_data.word)
 
             self.correct_presses = 0
             self.wrong_presses = 0
@@ -199,10 +224,10 @@ class Input(TextInput):
         else:
             self.line += unicode
 
-            current_line = self.root.central_ll.text_view_ll.current_line
-            current_word_data = current_line.words_data[self.root.current_word_num]
+            word_matcher = self.root.word_matcher
+            word_matcher.sync(self.line)
 
-            if not current_word_data.word.startswith(self.line):
+            if not word_matcher.is_prefix:
                 self.root.wrong_presses += 1
             else:
                 self.root.correct_presses += 1
@@ -216,22 +241,25 @@ class _GeneratedWord:
 
 
 class GeneratedLine(TextLine):
-    def __init__(self, font: Font, text_gen_limit: int | None = None, **kwargs):
+    def __init__(self, font: Font, text_gen_limit: int | None = None, queue_size: int = 4, **kwargs):
         super().__init__(font, **kwargs)
 
         self.text_gen = TextGenerator(limit=text_gen_limit)
+        self.line_queue = LineQueue(self.text_gen, measure=self._font.word_width, size=queue_size)
 
     def generate(self, max_width):
         self.width = max_width
-        self.line = ''
-        while True:
-            gen_word = self.text_gen.get()
-            word_len = sum(self._font.get_glyph(ord(i)).horizontal_advance for i in gen_word)
+        self.line = self.line_queue.pop(max_width)
 
-            if self._pen[0] + word_len < self.width:
-                self.line += gen_word + ' '
-            else:
-                break
+    def boost(self, word: str, factor: float) -> None:
+        # the queued lines were drawn with the old weights
+        self.text_gen.boost(word, factor)
+        self.line_queue.refill()
+
+    def release(self, keep_texture=False):
+        self.line_queue.stop()
+
+        super().release(keep_texture)
 
 
 class PlayingLine(TextLine):
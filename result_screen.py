@@ -1,9 +1,9 @@
 from src.interface.layouts.anchorlayout import AnchorLayout
 from src.interface.layouts.linelayout import LineLayout
+from src.interface.misc.font_manager import FontManager
 from src.interface.misc.mglmanagers import ProgramManager
 from src.interface.widgets.root import Root
 from src.interface.widgets.text_line import TextLine
-from src.interface.widgets.text_render import Font
 
 
 class Results(Root):
@@ -11,9 +11,10 @@ class Results(Root):
         super().__init__(ctx, 'results')
 
     def build(self) -> None:
-        title_font = Font(name='Inkfree', char_size=100)
-        lower_title_font = Font(name='Inkfree', char_size=50)
-        numbers_font = Font(name='CascadiaMono', char_size=30)
+        title_font = FontManager(self.ctx).get('Inkfree', 100, sdf=True)
+        lower_title_font = FontManager(self.ctx).get('Inkfree', 50, sdf=True)
+        # the overlapping contours of CascadiaMono break its distance field, it stays on bitmaps
+        numbers_font = FontManager(self.ctx).get('CascadiaMono', 30)
 
         al = AnchorLayout(parent=self)
 
@@ -14,16 +14,27 @@ def convert_vec2(w_size: tuple[int, int], vec2: tuple[int, int]) -> np.ndarray:
 
 
 def get_rect_vertices(fb_size, rect_size, rect_pos) -> np.ndarray:
-    arr = np.array([[0 for _ in range(2)] for _ in range(4)], dtype='float32')
+    return get_rects_vertices(fb_size, np.array((rect_size,)), np.array((rect_pos,)))[0]
 
-    i = 0
-    for x in (0, rect_size[0]):
-        for y in (0, rect_size[1]):
-            arr[i][0] = (rect_pos[0] + x) * 2 / fb_size[0] - 1
-            arr[i][1] = (rect_pos[1] + y) * 2 / fb_size[1] - 1
-            i += 1
 
-    return arr
+def get_rects_vertices(fb_size, sizes: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """
+        corners of many rects at once, as (n, 4, 2) in the order of the UV buffer
+    """
+    fb_size = np.asarray(fb_size, dtype='float64')
+    low = positions * 2 / fb_size - 1
+    high = (positions + sizes) * 2 / fb_size - 1
+
+    return np.stack((low, np.stack((low[:, 0], high[:, 1]), axis=1),
+                     np.stack((high[:, 0], low[:, 1]), axis=1), high), axis=1).astype('float32')
+
+
+def get_sub_rect_uv(size, texture_size) -> np.ndarray:
+    """
+        texture cords of the UV buffer scaled to the used part of a larger texture
+    """
+    scale = (size[0] / texture_size[0], size[1] / texture_size[1])
+    return np.array(((0, 0), (0, scale[1]), (scale[0], 0), scale), dtype='float32')
 
 
 def load_program(ctx: mgl.Context, shader_name: str) -> mgl.Program:
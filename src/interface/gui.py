@@ -8,7 +8,7 @@ import pygame as pg
 from .misc.mglmanagers import BufferManager
 from .misc.types import Child, Root
 from .misc.animation_manager import AnimationManager, Animation
-
+from .misc.glyph_prewarm import GlyphPrewarmer
 
 
 class GUI:
@@ -27,6 +27,7 @@ class GUI:
             cls._size = ctx.screen.size
             cls._current_root = None
             cls._roots = {}
+            cls._glyph_prewarmer = None
 
             cls.init(cls._instances[ctx])
 
@@ -49,7 +50,10 @@ class GUI:
 
     def build(self):
         for root in self._roots.values():
-            root.build()
+            root.ensure_built()
+
+    def prewarm_glyphs(self, fonts, chars) -> None:
+        self._glyph_prewarmer = GlyphPrewarmer(fonts, chars).start()
 
     def set_root(self, root_id: str) -> None:
         self._current_root = self._roots[root_id]
@@ -77,6 +81,10 @@ class GUI:
     def animation_manager(self) -> AnimationManager:
         return self._animation_manager
 
+    @property
+    def glyphs_ready(self) -> bool:
+        return self._glyph_prewarmer is None or self._glyph_prewarmer.ready.is_set()
+
     @property
     def current_root(self):
         return self._current_root
@@ -1,4 +1,7 @@
+import numpy as np
+
 from .linelayout import GUILayout
+from ..misc.geometry import resolve_sizes
 
 
 class AnchorLayout(GUILayout):
@@ -16,6 +19,10 @@ class AnchorLayout(GUILayout):
     def y_anchor(self):
         return self._y_anchor
 
+    def _measure(self) -> None:
+        min_size = self.geometry.min_size[np.array(self._rows, dtype='i8')]
+        self._min_size = tuple(int(v) for v in min_size.max(axis=0, initial=0))
+
     def _update_layout(self):
         if self.x_anchor == 'l':
             x_mod = 0
@@ -31,27 +38,14 @@ class AnchorLayout(GUILayout):
         else:
             y_mod = 1
 
-        min_w = min_h = 0
-        for widget in self._widgets:
-            if widget.base_height is not None:
-                w_h = widget.base_height
-            elif widget.height_hint is not None:
-                w_h = int(widget.height_hint * self.height)
-            else:
-                w_h = widget.min_height
-
-            if widget.base_width is not None:
-                w_w = widget.base_width
-            elif widget.width_hint is not None:
-                w_w = int(widget.width_hint * self.width)
-            else:
-                w_w = widget.min_width
-
-            widget.size = (w_w, w_h)
-            widget.pos = (self.width * x_mod - widget.width * x_mod,
-                          self.height * y_mod - widget.height * y_mod)
-
-            min_w = max(min_w, widget.min_width)
-            min_h = max(min_h, widget.min_height)
-
-        self._min_size = (min_w, min_h)
+        rows = np.array(self._rows, dtype='i8')
+        geometry = self.geometry
+        min_size = geometry.min_size[rows]
+
+        # widgets get their min size unless given a base or hinted one, and are never smaller
+        size = resolve_sizes(geometry.base_size[rows], geometry.size_hint[rows], np.array(self.size), min_size)
+        size = np.trunc(np.maximum(size, min_size))
+
+        pos = (np.array(self.size) - size) * (x_mod, y_mod)
+
+        self._arrange(pos, size)
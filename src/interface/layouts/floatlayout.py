@@ -1,3 +1,5 @@
+import numpy as np
+
 from .gui_layout import GUILayout
 
 
@@ -6,5 +8,5 @@ class FloatLayout(GUILayout):
         super().__init__(**kwargs)
 
     def _update_layout(self) -> None:
-        for widget in self._widgets:
-            widget.pos = widget.pos
+        # widgets stay where they are, only their quads follow the size of the layout
+        self.geometry.update_vertices(self.size, np.array(self._rows, dtype='i8'))
@@ -2,32 +2,66 @@ from __future__ import annotations
 from ..misc.types import Child
 
 from abc import ABC, abstractmethod
-import glm
-import moderngl as mgl
+import numpy as np
 
+from ..misc.damage import Damage, Rect, clip_rect, intersection, intersects
+from ..misc.geometry import GeometryStore
+from ..misc.mglmanagers import ProgramManager, FramebufferManager
 from ..widgets.gui_object import GUIObject
 
 
+CACHE_HINTS = ('on', 'off', 'auto')
+
+
 class GUILayout(GUIObject, ABC):
-    def __init__(self, **kwargs):
+    def __init__(self, cache: str = 'auto', **kwargs):
         self._widgets = []
         self._widget_ids = {}
+        # rows of the widgets in the geometry, in the order of _widgets
+        self._rows: list[int] = []
+        self._is_cached = False
+
+        # widgets are arranged again when the layout changes size or a measurement of a widget changes,
+        # the layout is measured again when a measurement of a widget changes
+        self._needs_update = True
+        self._needs_measure = True
+        # widgets with layout work left in their subtrees, the only ones a pass goes into
+        self._pending: set[Child] = set()
+        self._arranging = False
 
         super().__init__(**kwargs)
 
-        self._mem_texture = self.ctx.texture(size=self.size, components=4)
-        self._framebuffer = self.ctx.framebuffer(self._mem_texture)
+        self.geometry = GeometryStore(self.root.batcher)
 
-        self._needs_redraw = True
-        self._needs_update = True
+        # a cached layout renders into its own target and is composited from it,
+        # otherwise its widgets are drawn straight into the target of the parent
+        if cache not in CACHE_HINTS:
+            raise ValueError(f'Cache hint {cache} is not one of {CACHE_HINTS}')
+        self._cache = cache
+        self._mem_texture = self._framebuffer = None
+        self._mem_slot: int | None = None
+        # redraw requests since the compositor last looked, its measure of how often the subtree changes
+        self.changes = 0
+
+        self._damage = Damage()
+        # region of the framebuffer being redrawn, widgets outside of it are skipped
+        self._redraw_rect: Rect | None = None
+
+        self.is_cached = cache == 'on'
 
     # /////////////////////////////////////////////////// WIDGETS //////////////////////////////////////////////////////
 
     def add(self, widget: Child):
         self._widgets.append(widget)
+        self._rows.append(widget._row)
         if widget.id is not None:
             self._widget_ids[widget.id] = widget
 
+        if hasattr(widget, 'update_layout'):
+            self.layout_request(widget)
+        self.root.spatial_index.invalidate()
+
+        self.measure_request()
         self.update_request()
 
     def __getattr__(self, item):
@@ -39,7 +73,50 @@ class GUILayout(GUIObject, ABC):
 
     @property
     def framebuffer(self):
-        return self._framebuffer
+        return self._framebuffer if self._is_cached else self.parent.framebuffer
+
+    @property
+    def cache(self) -> str:
+        return self._cache
+
+    @cache.setter
+    def cache(self, value: str):
+        if value not in CACHE_HINTS:
+            raise ValueError(f'Cache hint {value} is not one of {CACHE_HINTS}')
+
+        self._cache = value
+        if value != 'auto':
+            self.is_cached = value == 'on'
+
+    @property
+    def is_cached(self) -> bool:
+        return self._is_cached
+
+    @is_cached.setter
+    def is_cached(self, value: bool):
+        if value == self._is_cached:
+            return
+
+        if value:
+            # the render target comes from a pool and may be larger than the layout, only its used part is sampled
+            self._mem_texture, self._framebuffer = FramebufferManager(self.ctx).get(self.size)
+            self._mem_slot = self.root.batcher.allocate()
+            self._update_mem_quad()
+            self._damage.add()
+        else:
+            self._release_target()
+
+        self._is_cached = value
+        self.parent.redraw_request(self.rect)
+
+    def _release_target(self) -> None:
+        if self._mem_slot is not None:
+            self._geometry.set_cache_quad(self._row, None)
+            self.root.batcher.free(self._mem_slot)
+            FramebufferManager(self.ctx).release_framebuffer(self._mem_texture, self._framebuffer)
+
+        self._mem_texture = self._framebuffer = None
+        self._mem_slot = None
 
     @GUIObject.size.setter
     def size(self, value: tuple[int, int]):
@@ -48,64 +125,141 @@ class GUILayout(GUIObject, ABC):
         self._update_framebuffer()
         self.update_request()
 
-    @GUIObject.pos.setter
-    def pos(self, value: tuple[int, int]):
-        GUIObject.pos.fset(self, value)
-
-        self.redraw_request()
-
-    # //////////////////////////////////////////////////// MOUSE ///////////////////////////////////////////////////////
-
-    def mouse_down(self, button_name: str, mouse_pos: tuple[int, int], count: int) -> Child | None:
-
-        for widget in self._widgets:
-            if widget.cords_in_rect(mouse_pos):
-                widget = widget.mouse_down(button_name, mouse_pos, count)
-                if widget is not None:
-                    return widget
-
-        return super().mouse_down(button_name, mouse_pos, count)
-
-    def mouse_up(self, button_name: str, mouse_pos: tuple[int, int]) -> Child | None:
-
-        for widget in self._widgets:
-            if widget.cords_in_rect(mouse_pos):
-                widget = widget.mouse_up(button_name, mouse_pos)
-                if widget is not None:
-                    return widget
-
-        return super().mouse_up(button_name, mouse_pos)
-
     # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
 
     def update_request(self):
+        """
+            arranges the widgets again in the next layout pass
+        """
         if not self._needs_update:
             self._needs_update = True
-            self.parent.update_request()
-
-    def redraw_request(self):
-        if not self._needs_redraw:
-            self._needs_redraw = True
-            self.parent.redraw_request()
+            self.parent.layout_request(self)
+
+    def measure_request(self):
+        """
+            measures the layout again in the next layout pass, the parent arranges again only if it changed
+        """
+        if not self._needs_measure:
+            self._needs_measure = True
+            self.parent.layout_request(self)
+
+    def layout_request(self, widget: Child):
+        """
+            marks the path down to widget for the next layout pass; while a pass goes through this layout
+            the request is taken in the same pass and goes no further up
+        """
+        if widget not in self._pending:
+            self._pending.add(widget)
+            if not self._arranging:
+                self.parent.layout_request(self)
+
+    def redraw_request(self, rect: Rect | None = None):
+        """
+            damages rect of the framebuffer, all of it by default, and the matching region of the parent
+        """
+        self.changes += 1
+
+        if rect is not None:
+            rect = clip_rect(rect, self.size)
+            if rect is None:
+                return
+
+        # without a cache there are no pixels of its own, the parent redraws the region
+        if not self._is_cached or self._damage.add(rect):
+            if rect is None:
+                self.parent.redraw_request(self.rect)
+            else:
+                x, y = self.rect[:2]
+                self.parent.redraw_request((rect[0] + x, rect[1] + y, rect[2], rect[3]))
 
     def _update_framebuffer(self) -> None:
-        self._mem_texture.release()
-        self._mem_texture = self.ctx.texture(size=self.size, components=4)
-        self._mem_texture.filter = (mgl.NEAREST, mgl.NEAREST)
+        if not self._is_cached or tuple(self._framebuffer.viewport[2:]) == self.size:
+            return
 
-        self._framebuffer.release()
-        self._framebuffer = self.ctx.framebuffer(self._mem_texture)
+        manager = FramebufferManager(self.ctx)
+        if manager.fits(self._mem_texture, self.size):
+            self._framebuffer.viewport = (0, 0) + self.size
+        else:
+            manager.release_framebuffer(self._mem_texture, self._framebuffer)
+            self._mem_texture, self._framebuffer = manager.get(self.size)
 
-    def update_layout(self):
-        if self._needs_update:
+        self._update_mem_quad()
+
+        self.redraw_request()
 
-            for w in self._widgets:
-                if hasattr(w, 'update_layout'):
-                    w.update_layout()
+    def _update_mem_quad(self) -> None:
+        # the same rect as the layout, sampling only the part of the pooled texture in use
+        texture_size = self._mem_texture.size
+        self._geometry.set_cache_quad(self._row, self._mem_slot,
+                                      (self.width / texture_size[0], self.height / texture_size[1]))
+        self._update_vertices()
 
-            self._update_layout()
+    def _arranged(self, moved: bool, resized: bool) -> None:
+        super()._arranged(moved, resized)
 
-            self._needs_update = False
+        if resized:
+            self._update_framebuffer()
+            self.update_request()
+
+    def _arrange(self, pos: np.ndarray, size: np.ndarray) -> None:
+        """
+            gives every widget, in the order of _widgets, its pos and size in one pass
+        """
+        for rect in self.geometry.arrange(np.array(self._rows, dtype='i8'), pos, size, self.size):
+            self.redraw_request(rect)
+
+    def update_layout(self):
+        self.measure()
+        self.arrange()
+
+    def measure(self) -> bool:
+        """
+            measures the pending subtrees, then the layout if needed; True if the measurement changed
+        """
+        for widget in self._pending:
+            if widget.measure():
+                self._needs_measure = self._needs_update = True
+
+        if not self._needs_measure:
+            return False
+
+        measurement = (self._min_size, self._base_size)
+        self._measure()
+        self._needs_measure = False
+        self.root.measured += 1
+
+        return (self._min_size, self._base_size) != measurement
+
+    def arrange(self) -> None:
+        """
+            arranges the widgets if needed, then goes into the pending subtrees
+        """
+        self._arranging = True
+
+        while self._needs_update or self._pending:
+            if self._needs_update:
+                self._update_layout()
+                # requests made by the widgets being arranged are already answered
+                self._needs_update = False
+                self.root.arranged += 1
+
+            while self._pending:
+                widget = self._pending.pop()
+                # a widget may have changed its measurement while being arranged
+                if widget.measure():
+                    self._needs_measure = self._needs_update = True
+                widget.arrange()
+
+        self._arranging = False
+
+        if self._needs_measure:
+            self.parent.layout_request(self)
+
+    def _measure(self) -> None:
+        """
+            finds the min size of the layout, and the base size if it has an own one, from the widgets
+        """
+        pass
 
     @abstractmethod
     def _update_layout(self) -> None:
@@ -114,33 +268,81 @@ class GUILayout(GUIObject, ABC):
     # /////////////////////////////////////////////////// DISPLAY //////////////////////////////////////////////////////
 
     def redraw(self):
-        if self._needs_redraw:
-            self._framebuffer.use()
-            self._framebuffer.clear()
+        if self._damage:
+            # pixels outside the damaged regions are kept from the previous frame
+            for rect in self._damage.regions(self.size):
+                self._redraw_rect = rect
+                self._framebuffer.scissor = rect
+                self._framebuffer.use()
+                self._framebuffer.clear(viewport=rect)
 
-            self._redraw()
+                self._redraw()
 
-            self._needs_redraw = False
+            self._redraw_rect = None
+            self._framebuffer.scissor = None
+            self._damage.clear()
 
     def _redraw(self):
+        # plain quads are collected and drawn together, in order with the widgets drawing themselves
+        batch = []
         for widget in self._widgets:
+            if self._redraw_rect is not None and not intersects(widget.rect, self._redraw_rect):
+                continue
+
+            if widget.batchable:
+                batch.append(widget)
+                continue
+
+            if batch:
+                self.root.batcher.draw_quads(batch)
+                batch = []
             widget.draw()
 
-    def draw(self):
-        self.update_layout()
-        self.redraw()
+        if batch:
+            self.root.batcher.draw_quads(batch)
+
+    def _draw_direct(self) -> None:
+        """
+            draws the widgets into the target of the parent, with the viewport moved onto this layout
+            and the scissor narrowed to it, so they are placed as if the layout had a framebuffer of its own
+        """
+        target = self.parent.framebuffer
+        viewport, scissor = target.viewport, target.scissor
 
-        self.parent.framebuffer.use()
+        x, y = viewport[0] + round(self.pos[0]), viewport[1] + round(self.pos[1])
+        own = (x, y, self.width, self.height)
+        clip = intersection(own, scissor if scissor is not None else viewport)
+        if clip is None:
+            return
+
+        target.viewport = own
+        target.scissor = clip
+        target.use()
+
+        self._redraw_rect = (clip[0] - x, clip[1] - y, clip[2], clip[3])
+        self._redraw()
+        self._redraw_rect = None
+
+        target.viewport = viewport
+        target.scissor = scissor
+        target.use()
+
+    def draw(self):
+        if self._is_cached:
+            self.redraw()
+            self.parent.framebuffer.use()
 
         self._texture.use()
-        self._vao.render(mgl.TRIANGLE_STRIP)
+        self.root.batcher.render(self._program, self.slot)
 
-        self._mem_texture.use()
-        self._vao.render(mgl.TRIANGLE_STRIP)
+        if self._is_cached:
+            self._mem_texture.use()
+            self.root.batcher.render(ProgramManager(self.ctx).get('textured_box'), self._mem_slot)
+        else:
+            self._draw_direct()
 
         if self._show_bbox:
-            self._bbox_vao.program['w_size'].write(glm.vec2(self.size))
-            self._bbox_vao.render(mgl.TRIANGLE_STRIP)
+            self.root.batcher.render_bbox(self.slot, self.size)
 
     def toggle_bbox(self, state=None):
         super().toggle_bbox(state)
@@ -158,10 +360,10 @@ class GUILayout(GUIObject, ABC):
 
         self._widgets = []
         self._widget_ids = {}
+        self._rows = []
 
     def release(self, keep_texture=False):
+        self._release_target()
         super().release(keep_texture)
 
-        self._mem_texture.release()
-        self._framebuffer.release()
         self._release_widgets(keep_texture)
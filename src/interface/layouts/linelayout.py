@@ -1,7 +1,10 @@
 from __future__ import annotations
 from ..misc.types import Child
 
+import numpy as np
+
 from .gui_layout import GUILayout
+from ..misc.geometry import resolve_sizes
 
 
 class LineLayout(GUILayout):
@@ -20,99 +23,48 @@ class LineLayout(GUILayout):
     def orientation(self):
         return self._orientation
 
-    def _update_layout(self) -> None:
-        min_width = min_height = 0
-
-        if self.orientation == 'vertical':
-
-            gathered_space = (self._padding * 2 +
-                              self._spacing * (len(self._widgets) - 1))
-
-            for widget in self._widgets:
-                if widget.base_height is not None:
-                    gathered_space += widget.height
-                elif widget.height_hint is not None:
-                    gathered_space += max(widget.height_hint * self.height, widget.min_height)
-                else:
-                    gathered_space += widget.min_height
-
-            if self.free_size_w_count != 0:
-                filling_widget_size = int((self.height - gathered_space) / self.free_size_w_count)
-            else:
-                filling_widget_size = 0
+    def _measure(self) -> None:
+        min_size = self.geometry.min_size[np.array(self._rows, dtype='i8')]
+        main, cross = (1, 0) if self.orientation == 'vertical' else (0, 1)
 
-            height_mem = self._padding
-            for widget in self._widgets:
+        layout_min_size = [0, 0]
+        layout_min_size[cross] = int(min_size[:, cross].max(initial=0)) + self._padding * 2
+        layout_min_size[main] = (int(min_size[:, main].sum()) + self._padding * 2 +
+                                 self._spacing * (len(min_size) - 1))
+        self._min_size = tuple(layout_min_size)
 
-                if widget.base_width is not None:
-                    w_w = widget.base_width
-                elif widget.width_hint is not None:
-                    w_w = int(widget.width_hint * self.width)
-                else:
-                    w_w = int(self.width - self._padding * 2)
-
-                widget.pos = (self._padding + (self.width - self._padding * 2 - w_w) / 2, height_mem)
-
-                if widget.base_height is not None:
-                    w_h = widget.base_height
-                elif widget.height_hint is not None:
-                    w_h = int(widget.height_hint * self.height)
-                else:
-                    w_h = filling_widget_size + widget.min_height
-
-                widget.size = (w_w, w_h)
+    def _update_layout(self) -> None:
+        rows = np.array(self._rows, dtype='i8')
+        geometry = self.geometry
+
+        # main runs along the orientation, cross goes across it
+        main, cross = (1, 0) if self.orientation == 'vertical' else (0, 1)
+        base, hint = geometry.base_size[rows], geometry.size_hint[rows]
+        min_size = geometry.min_size[rows]
+        spacing = self._spacing * (len(rows) - 1)
+
+        # fixed widgets take the space of their current size, hinted ones at least their min size
+        gathered = np.where(~np.isnan(base[:, main]), geometry.size[rows, main],
+                            np.maximum(np.nan_to_num(hint[:, main]) * self.size[main], min_size[:, main]))
+        gathered_space = self._padding * 2 + spacing + gathered.sum()
+
+        if self.free_size_w_count != 0:
+            filling_widget_size = int((self.size[main] - gathered_space) / self.free_size_w_count)
+        else:
+            filling_widget_size = 0
 
-                min_width = max(min_width, widget.min_width)
-                min_height += widget.min_height
-                height_mem += w_h + self._spacing
+        size = np.empty((len(rows), 2))
+        size[:, cross] = resolve_sizes(base[:, cross], hint[:, cross], self.size[cross],
+                                       int(self.size[cross] - self._padding * 2))
+        size[:, main] = resolve_sizes(base[:, main], hint[:, main], self.size[main],
+                                      filling_widget_size + min_size[:, main])
 
-            min_width += self._padding * 2
-            min_height += self._padding * 2 + self._spacing * (len(self._widgets) - 1)
+        pos = np.empty((len(rows), 2))
+        pos[:, cross] = self._padding + (self.size[cross] - self._padding * 2 - size[:, cross]) / 2
+        steps = size[:, main] + self._spacing
+        pos[:, main] = self._padding + np.cumsum(steps) - steps
 
-        else:
-            gathered_space = (self._padding * 2 +
-                              self._spacing * (len(self._widgets) - 1))
-
-            for widget in self._widgets:
-                if widget.base_width is not None:
-                    gathered_space += widget.width
-                elif widget.width_hint is not None:
-                    gathered_space += max(widget.width_hint * self.width, widget.min_width)
-                else:
-                    gathered_space += widget.min_width
-
-            if self.free_size_w_count != 0:
-                filling_widget_size = int((self.width - gathered_space) / self.free_size_w_count)
-            else:
-                filling_widget_size = 0
-
-            width_mem = self._padding
-            for widget in self._widgets:
-                if widget.base_height is not None:
-                    w_h = widget.base_height
-                elif widget.height_hint is not None:
-                    w_h = int(widget.height_hint * self.height)
-                else:
-                    w_h = int(self.height - self._padding * 2)
-
-                if widget.base_width is not None:
-                    w_w = widget.base_width
-                elif widget.width_hint is not None:
-                    w_w = int(widget.width_hint * self.width)
-                else:
-                    w_w = filling_widget_size + widget.min_width
-
-                widget.pos = (width_mem, self._padding + (self.height - self._padding * 2 - w_h) / 2)
-                widget.size = (w_w, w_h)
-
-                min_height = max(min_height, widget.min_height)
-                min_width += widget.min_width
-                width_mem += w_w + self._spacing
-
-            min_height += self._padding * 2
-            min_width += self._padding * 2 + self._spacing * (len(self._widgets) - 1)
-
-        self._min_size = (min_width, min_height)
+        self._arrange(pos, size)
 
     def add(self, widget: Child):
         if self.orientation == 'vertical':
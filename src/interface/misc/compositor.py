@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .types import Child, Root
+
+
+@dataclass
+class RenderNode:
+    layout: Child
+    depth: int
+    widgets: int  # widgets in the subtree, the layout included
+    change_rate: float  # redraw requests per frame
+    is_cached: bool
+
+
+class Compositor:
+    """
+        builds the render graph of one Root and decides which layouts render into an offscreen cache;
+        an 'auto' layout gets one when its subtree is large and rarely changes, so compositing it
+        is cheaper than drawing it again, everything else draws straight into the target of its parent
+    """
+    # frames between two decisions
+    INTERVAL = 60
+    MIN_WIDGETS = 6
+    MAX_CHANGE_RATE = 0.1
+
+    def __init__(self, root: Root):
+        self.root = root
+        self.graph: list[RenderNode] = []
+
+        self._frames = 0
+
+    def frame(self) -> None:
+        self._frames += 1
+        if self._frames >= self.INTERVAL:
+            self.plan()
+
+    def plan(self) -> list[RenderNode]:
+        frames = max(self._frames, 1)
+        self._frames = 0
+
+        self.graph = []
+        if self.root.widget is not None:
+            self._visit(self.root.widget, 0, frames)
+
+        return self.graph
+
+    def _visit(self, widget: Child, depth: int, frames: int) -> int:
+        if not hasattr(widget, 'cache'):
+            return 1
+
+        node = RenderNode(widget, depth, 1, widget.changes / frames, widget.is_cached)
+        self.graph.append(node)
+        widget.changes = 0
+
+        for child in widget._widgets:
+            node.widgets += self._visit(child, depth + 1, frames)
+
+        if widget.cache == 'auto':
+            widget.is_cached = node.widgets >= self.MIN_WIDGETS and node.change_rate <= self.MAX_CHANGE_RATE
+            node.is_cached = widget.is_cached
+
+        return node.widgets
+
+    def report(self) -> str:
+        return '\n'.join(f'{"  " * node.depth}{node.layout.id or type(node.layout).__name__}: '
+                         f'{"cached" if node.is_cached else "direct"}, {node.widgets} widgets, '
+                         f'{node.change_rate:.2f} changes/frame'
+                         for node in self.graph)
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import math
+
+Rect = tuple[int, int, int, int]  # x, y, width, height in framebuffer pixels
+
+
+def to_pixels(x: float, y: float, w: float, h: float) -> Rect:
+    """
+        smallest whole pixel rect covering the given one
+    """
+    left, bottom = math.floor(x), math.floor(y)
+    return left, bottom, math.ceil(x + w) - left, math.ceil(y + h) - bottom
+
+
+def clip_rect(rect: Rect, size: tuple[int, int]) -> Rect | None:
+    x, y = max(rect[0], 0), max(rect[1], 0)
+    w, h = min(rect[0] + rect[2], size[0]) - x, min(rect[1] + rect[3], size[1]) - y
+    if w <= 0 or h <= 0:
+        return None
+
+    return x, y, w, h
+
+
+def intersection(a: Rect, b: Rect) -> Rect | None:
+    x, y = max(a[0], b[0]), max(a[1], b[1])
+    w, h = min(a[0] + a[2], b[0] + b[2]) - x, min(a[1] + a[3], b[1] + b[3]) - y
+    if w <= 0 or h <= 0:
+        return None
+
+    return x, y, w, h
+
+
+def intersects(a: Rect, b: Rect) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def contains(a: Rect, b: Rect) -> bool:
+    return a[0] <= b[0] and a[1] <= b[1] and b[0] + b[2] <= a[0] + a[2] and b[1] + b[3] <= a[1] + a[3]
+
+
+def bounding_rect(rects: list[Rect]) -> Rect:
+    left, bottom = min(r[0] for r in rects), min(r[1] for r in rects)
+    right, top = max(r[0] + r[2] for r in rects), max(r[1] + r[3] for r in rects)
+
+    return left, bottom, right - left, top - bottom
+
+
+class Damage:
+    """
+        regions of one framebuffer to be redrawn before it is composited again;
+        starts as full, past MAX_RECTS the rects are merged into their bounding rect
+    """
+    MAX_RECTS = 8
+
+    def __init__(self):
+        self.full = True
+        self.rects: list[Rect] = []
+
+    def __bool__(self) -> bool:
+        return self.full or bool(self.rects)
+
+    def add(self, rect: Rect | None = None) -> bool:
+        """
+            rect None damages everything; False if the region was already damaged
+        """
+        if self.full:
+            return False
+
+        if rect is None:
+            self.full = True
+            self.rects = []
+            return True
+
+        if any(contains(r, rect) for r in self.rects):
+            return False
+
+        self.rects = [r for r in self.rects if not contains(rect, r)] + [rect]
+        if len(self.rects) > self.MAX_RECTS:
+            self.rects = [bounding_rect(self.rects)]
+
+        return True
+
+    def regions(self, size: tuple[int, int]) -> list[Rect]:
+        return [(0, 0, size[0], size[1])] if self.full else list(self.rects)
+
+    def clear(self) -> None:
+        self.full = False
+        self.rects = []
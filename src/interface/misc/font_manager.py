@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from moderngl import Context
+
+from ..widgets.text_render import Font
+
+# glyph bitmaps kept on the CPU by every Font of the manager, least recently used ones are dropped past it;
+# the atlas of a Font is not bounded by it, it grows with the distinct glyphs drawn
+MAX_GLYPHS = 512
+# measured word widths kept by every Font of the manager
+MAX_WORDS = 4096
+
+
+class FontManager:
+    _instances = {}
+
+    def __new__(cls, ctx: Context, *args, **kwargs):
+        if ctx not in cls._instances:
+            cls._instances[ctx] = super(FontManager, cls).__new__(cls)
+
+            cls.ctx = ctx
+            cls.fonts: dict[tuple[str, int, bool], Font] = {}
+            cls.hits = 0
+            cls.misses = 0
+
+        return cls._instances[ctx]
+
+    def get(self, name: str, char_size: int, sdf: bool = False) -> Font:
+        key = (name, char_size, sdf)
+        if key in self.fonts:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.fonts[key] = Font(name, char_size, sdf=sdf, max_glyphs=MAX_GLYPHS, max_words=MAX_WORDS)
+
+        return self.fonts[key]
+
+    def release_font(self, name: str, char_size: int, sdf: bool = False) -> None:
+        key = (name, char_size, sdf)
+        if key in self.fonts:
+            return self.fonts.pop(key).release(self.ctx)
+        else:
+            print('Warning: tried to release non-existent font')
+
+    def stats(self) -> dict[str, int]:
+        """
+            font lookups of the manager and glyph lookups of its fonts
+        """
+        fonts = self.fonts.values()
+        return {'font_hits': self.hits, 'font_misses': self.misses,
+                'glyph_hits': sum(font.hits for font in fonts), 'glyph_misses': sum(font.misses for font in fonts),
+                'glyph_evictions': sum(font.evictions for font in fonts)}
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import numpy as np
+
+from .damage import Damage, Rect
+from .quad_batcher import QuadBatcher
+from ...functions import get_rects_vertices
+
+
+def resolve_sizes(base: np.ndarray, hint: np.ndarray, length, fallback) -> np.ndarray:
+    """
+        base sizes where given, otherwise the hinted share of length, otherwise fallback
+    """
+    return np.where(~np.isnan(base), base, np.where(~np.isnan(hint), np.trunc(hint * length), fallback))
+
+
+class Column:
+    """
+        widget attribute kept in the geometry of its parent, at the row of the widget
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, widget, owner=None):
+        if widget is None:
+            return self
+        return widget._geometry.get(self.name, widget._row)
+
+    def __set__(self, widget, value):
+        widget._geometry.set(self.name, widget._row, value)
+
+
+class GeometryStore:
+    """
+        positions, sizes and quad slots of the children of one parent as columns, a row per child;
+        a relayout writes whole columns and the vertices of all the quads are made in one pass
+    """
+    # name, dtype and value of an empty row; None is kept as nan
+    COLUMNS = (
+        ('pos', 'f8', 0),
+        ('size', 'i8', 1),
+        ('min_size', 'i8', 1),
+        ('base_size', 'f8', np.nan),
+        ('size_hint', 'f8', np.nan),
+        ('slot', 'i8', -1),
+        # quad of the offscreen cache of a layout and the used part of its texture
+        ('cache_slot', 'i8', -1),
+        ('cache_uv', 'f8', 1),
+    )
+
+    def __init__(self, batcher: QuadBatcher, capacity: int = 8):
+        self.batcher = batcher
+
+        for name, dtype, empty in self.COLUMNS:
+            shape = (capacity,) if name.endswith('slot') else (capacity, 2)
+            setattr(self, name, np.full(shape, empty, dtype=dtype))
+
+        self.widgets: list = []
+        self._free: list[int] = []
+
+    @property
+    def capacity(self) -> int:
+        return len(self.slot)
+
+    # ///////////////////////////////////////////////////// ROWS ///////////////////////////////////////////////////////
+
+    def allocate(self, widget) -> int:
+        if self._free:
+            row = self._free.pop()
+            self.widgets[row] = widget
+        else:
+            if len(self.widgets) == self.capacity:
+                self._grow()
+
+            row = len(self.widgets)
+            self.widgets.append(widget)
+
+        self.slot[row] = self.batcher.allocate()
+        return row
+
+    def free(self, row: int) -> None:
+        self.batcher.free(int(self.slot[row]))
+
+        for name, dtype, empty in self.COLUMNS:
+            getattr(self, name)[row] = empty
+
+        self.widgets[row] = None
+        self._free.append(row)
+
+    def _grow(self) -> None:
+        for name, dtype, empty in self.COLUMNS:
+            column = getattr(self, name)
+            setattr(self, name, np.concatenate((column, np.full_like(column, empty))))
+
+    def get(self, name: str, row: int) -> tuple:
+        return tuple(None if value != value else value for value in getattr(self, name)[row].tolist())
+
+    def set(self, name: str, row: int, value) -> None:
+        getattr(self, name)[row] = [np.nan if v is None else v for v in value]
+
+    def set_cache_quad(self, row: int, slot: int | None, uv_size=(1, 1)) -> None:
+        self.cache_slot[row] = -1 if slot is None else slot
+        self.cache_uv[row] = uv_size
+
+    # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
+
+    def update_vertices(self, fb_size: tuple[int, int], rows: np.ndarray | int) -> None:
+        """
+            writes the quads of rows, and their cache quads, into the batcher
+        """
+        rows = np.atleast_1d(rows)
+        if not len(rows):
+            return
+
+        corners = get_rects_vertices(fb_size, self.size[rows], self.pos[rows])
+        self.batcher.set_quads(self.slot[rows], corners)
+
+        cached = self.cache_slot[rows] >= 0
+        if cached.any():
+            self.batcher.set_quads(self.cache_slot[rows][cached], corners[cached], self.cache_uv[rows][cached])
+
+    def arrange(self, rows: np.ndarray, pos: np.ndarray, size: np.ndarray, fb_size: tuple[int, int]) -> list[Rect]:
+        """
+            moves and resizes rows at once, sizes are kept to the min sizes like the size setter does;
+            gives the pixel rects left and taken by the widgets that changed, only those are told about it
+        """
+        size = np.maximum(size, self.min_size[rows]).astype('i8')
+        old_pos, old_size = self.pos[rows], self.size[rows]
+
+        moved = (old_pos != pos).any(axis=1)
+        resized = (old_size != size).any(axis=1)
+        changed = np.flatnonzero(moved | resized)
+
+        self.pos[rows] = pos
+        self.size[rows] = size
+        # the quads depend on the size of the parent too, so all of them are written
+        self.update_vertices(fb_size, rows)
+
+        for i in changed:
+            self.widgets[rows[i]]._arranged(bool(moved[i]), bool(resized[i]))
+
+        low = np.floor(np.concatenate((old_pos[changed], pos[changed])))
+        high = np.ceil(np.concatenate((old_pos[changed] + old_size[changed], pos[changed] + size[changed])))
+        if len(low) > Damage.MAX_RECTS:
+            low, high = low.min(axis=0, keepdims=True), high.max(axis=0, keepdims=True)
+
+        return [tuple(rect) for rect in np.hstack((low, high - low)).astype(int).tolist()]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import threading
+
+import numpy as np
+
+from ...settings import BASE_DIR
+
+# FILE LAYOUT
+#   MAGIC, then one record per rasterized glyph, appended as new glyphs appear:
+#   font hash (8s) | char size | dpi | code | width | rows | offset x | offset y | h advance | v advance | bitmap
+#   distance-field glyphs have DISTANCE_FIELD_FLAG set in their char size
+
+MAGIC = b'TGGLYPH1'
+RECORD = struct.Struct('<8sIiIIIiiii')
+DISTANCE_FIELD_FLAG = 1 << 31
+
+CacheKey = tuple[bytes, int, int]  # font file hash, char size, dpi
+
+
+class GlyphData:
+    __slots__ = ('bitmap', 'size', 'offset', 'horizontal_advance', 'vertical_advance')
+
+    def __init__(self, bitmap: np.ndarray, size: tuple[int, int], offset: tuple[int, int],
+                 horizontal_advance: int, vertical_advance: int):
+        self.bitmap = bitmap
+        self.size = size
+        self.offset = offset
+        self.horizontal_advance = horizontal_advance
+        self.vertical_advance = vertical_advance
+
+
+class GlyphCache:
+    """
+        rasterized glyphs of every font, size and dpi in one append-only file;
+        the file is read once, bitmaps are sliced from that buffer and new records are appended to both
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(GlyphCache, cls).__new__(cls)
+
+            cls.path = f'{BASE_DIR}/data/cache/glyphs.cache'
+            # contents of the file
+            cls.data = bytearray()
+            # record fields after the code, and the position of the bitmap in data
+            cls.records: dict[CacheKey, dict[int, tuple[int, int, int, int, int, int, int]]] = {}
+            cls.font_hashes: dict[str, bytes] = {}
+            cls.lock = threading.Lock()
+
+            cls._instance._load()
+
+        return cls._instance
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'rb') as file:
+                data = bytearray(file.read())
+        except FileNotFoundError:
+            return
+
+        if not data.startswith(MAGIC):
+            print(f'Warning: {self.path} is not a glyph cache, it will be rewritten')
+            os.remove(self.path)
+            return
+
+        pos = len(MAGIC)
+        while pos + RECORD.size <= len(data):
+            font_hash, char_size, dpi, code, width, rows, off_x, off_y, h_adv, v_adv = RECORD.unpack_from(data, pos)
+            if pos + RECORD.size + width * rows > len(data):
+                break
+            pos += RECORD.size
+
+            self.records.setdefault((font_hash, char_size, dpi), {})[code] = (width, rows, off_x, off_y,
+                                                                                h_adv, v_adv, pos)
+            pos += width * rows
+
+        if pos != len(data):
+            # a record cut short by an interrupted write
+            with open(self.path, 'r+b') as file:
+                file.truncate(pos)
+            del data[pos:]
+
+        self.data = data
+
+    def font_hash(self, path: str) -> bytes:
+        if path not in self.font_hashes:
+            with open(path, 'rb') as file:
+                self.font_hashes[path] = hashlib.blake2b(file.read(), digest_size=8).digest()
+
+        return self.font_hashes[path]
+
+    def get(self, key: CacheKey, code: int) -> GlyphData | None:
+        record = self.records.get(key, {}).get(code)
+        if record is None:
+            return None
+
+        width, rows, off_x, off_y, h_adv, v_adv, pos = record
+        with self.lock:
+            bitmap = np.frombuffer(self.data, dtype='u1', count=width * rows, offset=pos).copy()
+
+        return GlyphData(bitmap, (width, rows), (off_x, off_y), h_adv, v_adv)
+
+    def append(self, key: CacheKey, code: int, glyph) -> None:
+        width, rows = glyph.size
+        record = RECORD.pack(key[0], key[1], key[2], code, width, rows, glyph.offset[0], glyph.offset[1],
+                             glyph.horizontal_advance, glyph.vertical_advance)
+
+        bitmap = np.ascontiguousarray(glyph.bitmap, dtype='u1').tobytes()
+
+        with self.lock:
+            is_new = not os.path.exists(self.path)
+            if is_new:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self.data = bytearray(MAGIC)
+                self.records.clear()
+
+            with open(self.path, 'ab') as file:
+                if is_new:
+                    file.write(MAGIC)
+                file.write(record + bitmap)
+
+            self.data += record
+            pos = len(self.data)
+            self.data += bitmap
+
+            self.records.setdefault(key, {})[code] = (width, rows, glyph.offset[0], glyph.offset[1],
+                                                      glyph.horizontal_advance, glyph.vertical_advance, pos)
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+from typing import Iterable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..widgets.text_render import Font
+
+
+class GlyphPrewarmer:
+    """
+        rasterizes chars for every given Font on a worker thread; ready is set when it is done
+    """
+
+    def __init__(self, fonts: Iterable[Font], chars: Iterable[str]):
+        self._fonts = list(fonts)
+        self._chars = sorted(set(chars))
+
+        self.ready = threading.Event()
+        self._thread = threading.Thread(target=self._work, name='GlyphPrewarmer', daemon=True)
+
+    def start(self) -> GlyphPrewarmer:
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self.ready.wait(timeout)
+
+    def _work(self) -> None:
+        try:
+            for font in self._fonts:
+                for char in self._chars:
+                    font.get_glyph(ord(char))
+        finally:
+            self.ready.set()
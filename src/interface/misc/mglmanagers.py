@@ -1,4 +1,4 @@
-from moderngl import Context, Texture, Program, Buffer
+from moderngl import Context, Texture, Program, Buffer, Framebuffer, NEAREST
 import pygame as pg
 
 from ...functions import load_program
@@ -88,3 +88,63 @@ class BufferManager:
             return self.buffers.pop(name).release()
         else:
             print('Warning: tried to release non-existent buffer')
+
+
+class FramebufferManager:
+    """
+        pool of render targets in size buckets; a layout keeps its target while its size stays in the bucket
+        and draws to the used part only, released targets are handed out again
+    """
+    _instances = {}
+
+    # released targets kept per bucket, the rest are freed
+    MAX_FREE = 2
+
+    def __new__(cls, ctx: Context, *args, **kwargs):
+        if ctx not in cls._instances:
+            cls._instances[ctx] = super(FramebufferManager, cls).__new__(cls)
+
+            cls.ctx = ctx
+            cls.free: dict[tuple[int, int], list[tuple[Texture, Framebuffer]]] = {}
+            cls.created = 0
+            cls.reused = 0
+
+        return cls._instances[ctx]
+
+    @staticmethod
+    def bucket(size: tuple[int, int]) -> tuple[int, int]:
+        """
+            each side rounded up to a step of an eighth of its power of two, at most 1/8 of it is unused
+        """
+        def side(n: int) -> int:
+            n = max(int(n), 32)
+            step = 1 << (n.bit_length() - 3)
+            return -(-n // step) * step
+
+        return side(size[0]), side(size[1])
+
+    def fits(self, texture: Texture, size: tuple[int, int]) -> bool:
+        return texture.size == self.bucket(size)
+
+    def get(self, size: tuple[int, int]) -> tuple[Texture, Framebuffer]:
+        bucket = self.bucket(size)
+        if self.free.get(bucket):
+            texture, framebuffer = self.free[bucket].pop()
+            self.reused += 1
+        else:
+            texture = self.ctx.texture(size=bucket, components=4)
+            texture.filter = (NEAREST, NEAREST)
+            framebuffer = self.ctx.framebuffer(texture)
+            self.created += 1
+
+        framebuffer.viewport = (0, 0, int(size[0]), int(size[1]))
+
+        return texture, framebuffer
+
+    def release_framebuffer(self, texture: Texture, framebuffer: Framebuffer) -> None:
+        free = self.free.setdefault(texture.size, [])
+        if len(free) < self.MAX_FREE:
+            free.append((texture, framebuffer))
+        else:
+            framebuffer.release()
+            texture.release()
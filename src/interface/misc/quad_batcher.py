@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import glm
+import numpy as np
+import moderngl as mgl
+
+from .mglmanagers import ProgramManager
+from ...functions import get_rect_vertices
+
+
+class QuadBatcher:
+    """
+        quads of every GUIObject of one Root in a single vertex buffer, one slot each;
+        slots changed since the last draw are written in contiguous ranges, and runs of
+        neighbouring slots with the same program and texture are drawn by one call
+    """
+    # two triangles of in_position (2f) and in_texture_cords (2f)
+    SLOT_VERTICES = 6
+    SLOT_FLOATS = SLOT_VERTICES * 4
+    # the strip corners 0 1 2 3 as the triangles 0 1 2 and 2 1 3
+    ORDER = (0, 1, 2, 2, 1, 3)
+
+    def __init__(self, ctx: mgl.Context, capacity: int = 256):
+        self.ctx = ctx
+
+        self._data = np.zeros((capacity, self.SLOT_FLOATS), dtype='f4')
+        self._buffer = ctx.buffer(reserve=self._data.nbytes)
+        self._vaos: dict[mgl.Program, mgl.VertexArray] = {}
+
+        self._count = 0
+        self._free: list[int] = []
+        self._dirty: set[int] = set()
+
+        # buffer writes, to see how well dirty slots coalesce
+        self.writes = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    # ///////////////////////////////////////////////////// SLOTS //////////////////////////////////////////////////////
+
+    def allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+
+        if self._count == self.capacity:
+            self._grow()
+
+        self._count += 1
+        return self._count - 1
+
+    def free(self, slot: int) -> None:
+        self._data[slot] = 0
+        self._dirty.add(slot)
+        self._free.append(slot)
+
+    def _grow(self) -> None:
+        self._data = np.concatenate((self._data, np.zeros_like(self._data)))
+
+        # vertex arrays hold the old buffer, they are made again on the next draw
+        for vao in self._vaos.values():
+            vao.release()
+        self._vaos = {}
+
+        self._buffer.release()
+        self._buffer = self.ctx.buffer(reserve=self._data.nbytes)
+        self._dirty.update(range(self._count))
+
+    def set_quad(self, slot: int, fb_size, rect_size, rect_pos, uv_size=(1, 1)) -> None:
+        corners = get_rect_vertices(fb_size=fb_size, rect_size=rect_size, rect_pos=rect_pos)
+        self.set_quads(np.array((slot,)), corners[None], np.array((uv_size,)))
+
+    def set_quads(self, slots: np.ndarray, corners: np.ndarray, uv_sizes: np.ndarray | None = None) -> None:
+        """
+            writes the (n, 4, 2) strip corners into slots, uv_sizes scale the texture cords of each quad
+        """
+        if uv_sizes is None:
+            uv_sizes = np.ones((len(slots), 2))
+
+        uv = np.zeros_like(corners)
+        uv[:, 1, 1] = uv_sizes[:, 1]
+        uv[:, 2, 0] = uv_sizes[:, 0]
+        uv[:, 3] = uv_sizes
+
+        self._data[slots] = np.concatenate((corners, uv), axis=2)[:, self.ORDER].reshape(len(slots), -1)
+        self._dirty.update(slots.tolist())
+
+    def flush(self) -> None:
+        if not self._dirty:
+            return
+
+        dirty = sorted(self._dirty)
+        self._dirty.clear()
+
+        start = prev = dirty[0]
+        for slot in dirty[1:] + [None]:
+            if slot is not None and slot == prev + 1:
+                prev = slot
+                continue
+
+            self._buffer.write(self._data[start:prev + 1].tobytes(), offset=start * self.SLOT_FLOATS * 4)
+            self.writes += 1
+
+            if slot is not None:
+                start = prev = slot
+
+    # //////////////////////////////////////////////////// DISPLAY /////////////////////////////////////////////////////
+
+    def vao(self, program: mgl.Program) -> mgl.VertexArray:
+        if program not in self._vaos:
+            self._vaos[program] = self.ctx.vertex_array(program,
+                                                        [
+                                                            (self._buffer, '2f 2f /v',
+                                                             'in_position', 'in_texture_cords')
+                                                        ])
+
+        return self._vaos[program]
+
+    def render(self, program: mgl.Program, slot: int, count: int = 1) -> None:
+        """
+            draws count quads from slot on with the bound texture
+        """
+        self.flush()
+        self.vao(program).render(mgl.TRIANGLES, vertices=count * self.SLOT_VERTICES, first=slot * self.SLOT_VERTICES)
+
+    def render_bbox(self, slot: int, size: tuple[int, int]) -> None:
+        program = ProgramManager(self.ctx).get('bbox_outline')
+        program['w_size'].write(glm.vec2(size))
+        self.render(program, slot)
+
+    def draw_quads(self, widgets: list) -> None:
+        """
+            draws the quads of widgets in order, one call per run of consecutive slots sharing program and texture
+        """
+        i = 0
+        while i < len(widgets):
+            first = widgets[i]
+            j = i + 1
+            while (j < len(widgets) and widgets[j].slot == first.slot + j - i
+                   and widgets[j].program is first.program and widgets[j].texture is first.texture):
+                j += 1
+
+            first.texture.use()
+            self.render(first.program, first.slot, j - i)
+            i = j
+
+    # /////////////////////////////////////////////////// RELEASE //////////////////////////////////////////////////////
+
+    def release(self) -> None:
+        for vao in self._vaos.values():
+            vao.release()
+        self._vaos = {}
+
+        self._buffer.release()
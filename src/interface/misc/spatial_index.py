@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from .types import Child, Root
+
+
+class SpatialIndex:
+    """
+        window rects of the widgets of one Root in a uniform grid, for hit testing and window positions;
+        a moved or resized widget has its subtree placed again on the next query,
+        added or released widgets make the whole index be built again
+    """
+    # side of a grid cell in pixels
+    CELL = 64
+
+    def __init__(self, root: Root):
+        self.root = root
+
+        self._stale = True
+        self._moved: set[Child] = set()
+
+        # entries in pre-order, so the subtree of an entry is the range up to its end
+        self._entries: dict[Child, int] = {}
+        self._widgets: list[Child] = []
+        self._parents: list[int] = []
+        self._children: list[list[int]] = []
+        self._ends: list[int] = []
+        self._rects: list[tuple[float, float, int, int]] = []
+        # post-order, the order in which the tree is tried for a press
+        self._order: list[int] = []
+        self._cells: list[list[tuple[int, int]]] = []
+        self._grid: dict[tuple[int, int], set[int]] = {}
+        self._count = 0
+
+        self.rebuilds = 0
+        self.updates = 0
+
+    def invalidate(self, widget: Child | None = None) -> None:
+        """
+            widget was moved or resized; None for widgets added or released
+        """
+        if widget is None:
+            self._stale = True
+        elif not self._stale:
+            self._moved.add(widget)
+
+    # ///////////////////////////////////////////////////// QUERY //////////////////////////////////////////////////////
+
+    def window_pos(self, widget: Child) -> tuple[float, float]:
+        self._refresh()
+
+        if widget not in self._entries:
+            # not in the tree of the root yet
+            parent_pos = widget.parent.window_pos
+            return parent_pos[0] + widget.pos[0], parent_pos[1] + widget.pos[1]
+
+        rect = self._rects[self._entries[widget]]
+        return rect[0], rect[1]
+
+    def hits(self, point: tuple[int, int]) -> list[Child]:
+        """
+            widgets under point, in the order the tree tries them: the widgets of a layout in order and
+            before the layout itself; a widget counts only if the layouts above it, but the top one, do too
+        """
+        self._refresh()
+        if not self._widgets:
+            return []
+
+        x, y = point
+        cell = self._grid.get((int(x // self.CELL), int(y // self.CELL)), ())
+        hit = {entry for entry in cell if self._contains(entry, x, y)}
+        # the top widget is tried wherever the point is
+        hit.add(0)
+
+        found = []
+        for entry in hit:
+            parent = self._parents[entry]
+            while parent > 0 and parent in hit:
+                parent = self._parents[parent]
+            if parent <= 0:
+                found.append(entry)
+
+        found.sort(key=self._order.__getitem__)
+        return [self._widgets[entry] for entry in found]
+
+    def _contains(self, entry: int, x: float, y: float) -> bool:
+        left, bottom, width, height = self._rects[entry]
+        return 0 < x - left < width and 0 < y - bottom < height
+
+    # ///////////////////////////////////////////////////// BUILD //////////////////////////////////////////////////////
+
+    def _refresh(self) -> None:
+        if self._stale:
+            self._rebuild()
+            return
+
+        if self._moved:
+            # ancestors come first in pre-order, a moved widget inside a subtree placed again is skipped
+            covered = -1
+            for entry in sorted(self._entries[widget] for widget in self._moved if widget in self._entries):
+                if entry < covered:
+                    continue
+
+                widget = self._widgets[entry]
+                parent = self._parents[entry]
+                parent_pos = self._rects[parent][:2] if parent >= 0 else self.root.window_pos
+                self._place_subtree(entry, (parent_pos[0] + widget.pos[0], parent_pos[1] + widget.pos[1]),
+                                    widget.size)
+
+                covered = self._ends[entry]
+                self.updates += 1
+
+            self._moved.clear()
+
+    def _rebuild(self) -> None:
+        self._entries = {}
+        self._widgets, self._parents, self._children, self._ends = [], [], [], []
+        self._rects, self._order, self._cells = [], [], []
+        self._grid = {}
+        self._count = 0
+
+        widget = self.root.widget
+        if widget is not None:
+            root_pos = self.root.window_pos
+            self._add(widget, -1, (root_pos[0] + widget.pos[0], root_pos[1] + widget.pos[1]), widget.size)
+
+        self._stale = False
+        self._moved.clear()
+        self.rebuilds += 1
+
+    def _add(self, widget: Child, parent: int, window_pos: tuple[float, float], size: tuple[int, int]) -> int:
+        entry = len(self._widgets)
+        self._entries[widget] = entry
+        self._widgets.append(widget)
+        self._parents.append(parent)
+        self._children.append([])
+        self._ends.append(entry + 1)
+        self._rects.append(window_pos + tuple(size))
+        self._order.append(0)
+        self._cells.append([])
+        self._place(entry)
+
+        for child, pos, child_size in self._child_geometry(widget):
+            self._children[entry].append(self._add(child, entry, (window_pos[0] + pos[0], window_pos[1] + pos[1]),
+                                                   child_size))
+
+        self._ends[entry] = len(self._widgets)
+        self._order[entry] = self._count
+        self._count += 1
+
+        return entry
+
+    @staticmethod
+    def _child_geometry(widget: Child):
+        if not hasattr(widget, '_widgets'):
+            return ()
+
+        # read from the columns of the layout at once, not widget by widget
+        geometry = widget.geometry
+        return zip(widget._widgets, geometry.pos[widget._rows].tolist(), geometry.size[widget._rows].tolist())
+
+    def _place_subtree(self, entry: int, window_pos: tuple[float, float], size: tuple[int, int]) -> None:
+        self._rects[entry] = window_pos + tuple(size)
+        self._place(entry)
+
+        widget = self._widgets[entry]
+        for child_entry, (_, pos, child_size) in zip(self._children[entry], self._child_geometry(widget)):
+            self._place_subtree(child_entry, (window_pos[0] + pos[0], window_pos[1] + pos[1]), child_size)
+
+    def _place(self, entry: int) -> None:
+        for cell in self._cells[entry]:
+            self._grid[cell].discard(entry)
+
+        left, bottom, width, height = self._rects[entry]
+        cells = [(cx, cy)
+                 for cx in range(int(left // self.CELL), int((left + width) // self.CELL) + 1)
+                 for cy in range(int(bottom // self.CELL), int((bottom + height) // self.CELL) + 1)]
+
+        for cell in cells:
+            self._grid.setdefault(cell, set()).add(entry)
+        self._cells[entry] = cells
@@ -2,15 +2,22 @@ from __future__ import annotations
 from ..misc.types import Child, Parent
 
 from typing import Callable
-import glm
 import moderngl as mgl
 from abc import ABC
 
-from ..misc.mglmanagers import ProgramManager, BufferManager, TextureManager
-from ...functions import get_rect_vertices
+from ..misc.damage import Rect, to_pixels
+from ..misc.geometry import Column
+from ..misc.mglmanagers import ProgramManager, TextureManager
 
 
 class GUIObject(ABC):
+    # views into the row of the widget in the geometry of its parent
+    _pos = Column('pos')
+    _size = Column('size')
+    _min_size = Column('min_size')
+    _base_size = Column('base_size')
+    _size_hint = Column('size_hint')
+
     def __init__(self,
                  parent: Parent,
                  id: str | None = None,
@@ -33,6 +40,10 @@ class GUIObject(ABC):
         # TREE RELATED
         self._id = id
         self._parent = parent
+        self._root = parent.root
+        # form and quad slot live in a row of the geometry of the parent, next to the siblings
+        self._geometry = parent.geometry
+        self._row = self._geometry.allocate(self)
 
         # FORM
         self._resize_func = resize_func
@@ -50,18 +61,10 @@ class GUIObject(ABC):
             texture = TextureManager(self.ctx).get('None.png')
         self._texture = texture
 
-        self._vertices = self.ctx.buffer(reserve=32)
         if program is None:
             program = ProgramManager(self.ctx).get('textured_box')
         self._program = program
 
-        self._vao = self._get_vao()
-        self._bbox_vao = self.ctx.vertex_array(ProgramManager(self.ctx).get('bbox_outline'),
-                                               [
-                                                   (self._vertices, '2f /v', 'in_position'),
-                                                   (BufferManager(self.ctx).get('UV'), '2f /v',
-                                                    'in_texture_cords')
-                                               ])
         self._update_vertices()
 
         # INPUT
@@ -81,13 +84,6 @@ class GUIObject(ABC):
         # ADD TO PARENT
         self.parent.add(self)
 
-    def _get_vao(self) -> mgl.VertexArray:
-        return self.ctx.vertex_array(self._program,
-                                     [
-                                         (self._vertices, '2f /v', 'in_position'),
-                                         (BufferManager(self.ctx).get('UV'), '2f /v', 'in_texture_cords')
-                                     ])
-
     def cords_in_rect(self, cords):
         return all(0 < cords[i] - self.window_pos[i] < self.size[i] for i in (0, 1))
 
@@ -110,7 +106,7 @@ class GUIObject(ABC):
 
     @property
     def root(self):
-        return self._parent.root
+        return self._root
 
     @property
     def texture(self) -> mgl.Texture:
@@ -122,7 +118,18 @@ class GUIObject(ABC):
 
     @property
     def vao(self) -> mgl.VertexArray:
-        return self._vao
+        return self.root.batcher.vao(self._program)
+
+    @property
+    def slot(self) -> int:
+        return int(self._geometry.slot[self._row])
+
+    @property
+    def batchable(self) -> bool:
+        """
+            drawn as a plain textured quad, so the parent may draw it together with its neighbours
+        """
+        return type(self).draw is GUIObject.draw and not self._show_bbox
 
     @property
     def is_in_focus(self):
@@ -142,19 +149,24 @@ class GUIObject(ABC):
 
     @pos.setter
     def pos(self, value: tuple[int, int]):
+        # both the area left and the area taken are damaged in the parent
+        self.parent.redraw_request(self.rect)
+
         if self._pos != value:
             self._pos = value
 
             if self._repos_func is not None:
                 self._repos_func()
 
-        self._update_vertices()
+            self.parent.redraw_request(self.rect)
+            self.root.spatial_index.invalidate(self)
 
-        self.parent.redraw_request()
+        self._update_vertices()
 
     @property
     def window_pos(self) -> tuple[int, int]:
-        return self.parent.window_pos[0] + self._pos[0], self.parent.window_pos[1] + self._pos[1]
+        # kept by the root with the rects for hit testing, instead of walking up the parents
+        return self.root.spatial_index.window_pos(self)
 
     @property
     def size(self) -> tuple[int, int]:
@@ -163,7 +175,10 @@ class GUIObject(ABC):
     @size.setter
     def size(self, value: tuple[int, int]):
         if self._size != value:
+            self.parent.redraw_request(self.rect)
             self._size = (max(self._min_size[0], value[0]), max(self._min_size[1], value[1]))
+            self.parent.redraw_request(self.rect)
+            self.root.spatial_index.invalidate(self)
 
             if self._resize_func is not None:
                 self._resize_func()
@@ -172,6 +187,13 @@ class GUIObject(ABC):
 
             self.parent.update_request()
 
+    @property
+    def rect(self) -> Rect:
+        """
+            pixels covered in the framebuffer of the parent
+        """
+        return to_pixels(*self._pos, *self._size)
+
     @property
     def width(self) -> int:
         return self._size[0]
@@ -251,10 +273,20 @@ class GUIObject(ABC):
     # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
 
     def _update_vertices(self):
-        self.parent.framebuffer.use()
-        self._vertices.write(get_rect_vertices(fb_size=self.ctx.fbo.viewport[2:],
-                                               rect_size=self.size,
-                                               rect_pos=self.pos))
+        # the parent is drawn into with a viewport of its own size, cached or not
+        self._geometry.update_vertices(self.parent.size, self._row)
+
+    def _arranged(self, moved: bool, resized: bool) -> None:
+        """
+            called by the geometry of the parent after a relayout moved or resized the widget,
+            the parent damages the regions itself
+        """
+        self.root.spatial_index.invalidate(self)
+
+        if moved and self._repos_func is not None:
+            self._repos_func()
+        if resized and self._resize_func is not None:
+            self._resize_func()
 
     # //////////////////////////////////////////////////// INPUT ///////////////////////////////////////////////////////
 
@@ -325,11 +357,10 @@ class GUIObject(ABC):
 
     def draw(self) -> None:
         self._texture.use()
-        self._vao.render(mgl.TRIANGLE_STRIP)
+        self.root.batcher.render(self._program, self.slot)
 
         if self._show_bbox:
-            self._bbox_vao.program['w_size'].write(glm.vec2(self.size))
-            self._bbox_vao.render(mgl.TRIANGLE_STRIP)
+            self.root.batcher.render_bbox(self.slot, self.size)
 
     def toggle_bbox(self, state=None):
         if state is not None:
@@ -340,10 +371,8 @@ class GUIObject(ABC):
     # /////////////////////////////////////////////////// RELEASE //////////////////////////////////////////////////////
 
     def release(self, keep_texture=False):
-        self._vertices.release()
+        self._geometry.free(self._row)
+        self.root.spatial_index.invalidate()
 
         if not keep_texture:
             self._texture.release()
-
-        self._vao.release()
-        self._bbox_vao.release()
@@ -2,11 +2,18 @@ from __future__ import annotations
 from ..misc.types import Child
 
 from abc import abstractmethod, ABC
+import glm
 import numpy as np
 import moderngl as mgl
 
 from ..gui import GUI
-from ..misc.mglmanagers import ProgramManager, BufferManager
+from ..misc.compositor import Compositor
+from ..misc.damage import Damage, Rect, clip_rect
+from ..misc.mglmanagers import ProgramManager, BufferManager, FramebufferManager
+from ..misc.geometry import GeometryStore
+from ..misc.quad_batcher import QuadBatcher
+from ..misc.spatial_index import SpatialIndex
+from ...functions import get_rect_vertices, get_sub_rect_uv
 
 
 class Root(ABC):
@@ -18,20 +25,42 @@ class Root(ABC):
         self._ctx = ctx
 
         self._vertices = self.ctx.buffer(np.array(((-1, 1), (-1, -1), (1, 1), (1, -1)), dtype='float32'))
+
+        self._mem_texture, self._framebuffer = FramebufferManager(self.ctx).get(self.size)
+        self._mem_uv = self.ctx.buffer(get_sub_rect_uv(self.size, self._mem_texture.size))
         self._vao = self.ctx.vertex_array(ProgramManager(self.ctx).get('textured_box'),
                                           [
                                               (self._vertices, '2f /v', 'in_position'),
-                                              (BufferManager(self.ctx).get('UV'), '2f /v', 'in_texture_cords')
+                                              (self._mem_uv, '2f /v', 'in_texture_cords')
                                           ])
 
-        self._mem_texture = self.ctx.texture(size=self.size, components=4)
-        self._framebuffer = self.ctx.framebuffer(self._mem_texture)
-
         # DEBUG
         self._show_bbox = False
-
-        self._needs_redraw = True
+        # regions redrawn by the last redraw, outlined on screen while the bbox overlay is on
+        self._shown_damage: list[Rect] = []
+        self._damage_vertices = self.ctx.buffer(reserve=32)
+        self._damage_vao = self.ctx.vertex_array(ProgramManager(self.ctx).get('bbox_outline'),
+                                                 [
+                                                     (self._damage_vertices, '2f /v', 'in_position'),
+                                                     (BufferManager(self.ctx).get('UV'), '2f /v', 'in_texture_cords')
+                                                 ])
+
+        self._damage = Damage()
         self._needs_update = True
+        # some layout below has measuring or arranging to do
+        self._needs_layout = True
+        # layouts measured and arranged by the last layout pass
+        self.measured = 0
+        self.arranged = 0
+
+        self.compositor = Compositor(self)
+        # quads of all the widgets under this root
+        self.batcher = QuadBatcher(self.ctx)
+        self.geometry = GeometryStore(self.batcher, capacity=1)
+        # window rects of the widgets, for hit testing
+        self.spatial_index = SpatialIndex(self)
+
+        self._is_built = False
 
         # WIDGET
         self._widget: Child | None = None
@@ -46,12 +75,20 @@ class Root(ABC):
             self._widget.release()
 
         self._widget = widget
+        self.spatial_index.invalidate()
+        self.layout_request(widget)
         self.update_request()
 
     def use(self):
         self.size = self.gui.size
+        self.ensure_built()
         self.gui.set_root(self.id)
 
+    def ensure_built(self) -> None:
+        if not self._is_built:
+            self._is_built = True
+            self.build()
+
     @abstractmethod
     def build(self) -> None:
         pass
@@ -112,16 +149,22 @@ class Root(ABC):
     # //////////////////////////////////////////////////// MOUSE ///////////////////////////////////////////////////////
 
     def mouse_down(self, button_name: str, mouse_pos: tuple[int, int], count: int) -> Child | None:
-        if self._widget is not None:
-            return self._widget.mouse_down(button_name, mouse_pos, count)
+        for widget in self.spatial_index.hits(mouse_pos):
+            widget = widget.mouse_down(button_name, mouse_pos, count)
+            if widget is not None:
+                return widget
 
     def mouse_up(self, button_name: str, mouse_pos: tuple[int, int]) -> Child | None:
-        if self._widget is not None:
-            return self._widget.mouse_up(button_name, mouse_pos)
+        for widget in self.spatial_index.hits(mouse_pos):
+            widget = widget.mouse_up(button_name, mouse_pos)
+            if widget is not None:
+                return widget
 
     def mouse_drag(self, button_name: str, mouse_pos: tuple[int, int], rel: tuple[int, int]) -> Child | None:
-        if self._widget is not None:
-            return self._widget.mouse_drag(button_name, mouse_pos, rel)
+        for widget in self.spatial_index.hits(mouse_pos):
+            widget = widget.mouse_drag(button_name, mouse_pos, rel)
+            if widget is not None:
+                return widget
 
     # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
 
@@ -135,38 +178,59 @@ class Root(ABC):
 
             self._needs_update = False
 
+        if self._needs_layout and hasattr(self._widget, 'update_layout'):
+            self._needs_layout = False
+            self.measured = self.arranged = 0
+            self._widget.update_layout()
+
     def _update_framebuffer(self) -> None:
-        self._mem_texture.release()
-        self._mem_texture = self.ctx.texture(size=self.size, components=4)
-        self._mem_texture.filter = (mgl.NEAREST, mgl.NEAREST)
+        manager = FramebufferManager(self.ctx)
+        if manager.fits(self._mem_texture, self.size):
+            self._framebuffer.viewport = (0, 0) + tuple(self.size)
+        else:
+            manager.release_framebuffer(self._mem_texture, self._framebuffer)
+            self._mem_texture, self._framebuffer = manager.get(self.size)
 
-        self._framebuffer.release()
-        self._framebuffer = self.ctx.framebuffer(self._mem_texture)
+        self._mem_uv.write(get_sub_rect_uv(self.size, self._mem_texture.size))
+
+        self._damage.add()
 
     def update_request(self) -> None:
         if not self._needs_update:
             self._needs_update = True
             self.redraw_request()
 
-    def redraw_request(self) -> None:
-        if not self._needs_redraw:
-            self._needs_redraw = True
+    def layout_request(self, widget: Child) -> None:
+        self._needs_layout = True
+
+    def redraw_request(self, rect: Rect | None = None) -> None:
+        if rect is not None:
+            rect = clip_rect(rect, self.size)
+            if rect is None:
+                return
+
+        self._damage.add(rect)
 
     # /////////////////////////////////////////////////// DISPLAY //////////////////////////////////////////////////////
 
     def redraw(self) -> None:
-        if self._needs_redraw:
-            self._framebuffer.use()
-            self._framebuffer.clear()
+        if self._damage:
+            self._shown_damage = self._damage.regions(self.size)
+            for rect in self._shown_damage:
+                self._framebuffer.scissor = rect
+                self._framebuffer.use()
+                self._framebuffer.clear(viewport=rect)
 
-            self._widget.draw()
+                self._widget.draw()
 
-            self._needs_redraw = False
+            self._framebuffer.scissor = None
+            self._damage.clear()
 
     def draw(self) -> None:
         if self._widget is None:
             return
 
+        self.compositor.frame()
         self.update_layout()
         self.redraw()
 
@@ -174,6 +238,18 @@ class Root(ABC):
         self._mem_texture.use()
         self._vao.render(mgl.TRIANGLE_STRIP)
 
+        if self._show_bbox:
+            self._draw_damage()
+
+    def _draw_damage(self) -> None:
+        # the framebuffer of the root is drawn to the screen upside down, so are the rects in it
+        for rect in self._shown_damage:
+            x, y, w, h = rect
+            self._damage_vertices.write(get_rect_vertices(fb_size=self.size, rect_size=(w, h),
+                                                          rect_pos=(x, self.size[1] - y - h)))
+            self._damage_vao.program['w_size'].write(glm.vec2(rect[2:]))
+            self._damage_vao.render(mgl.TRIANGLE_STRIP)
+
     def toggle_bbox(self, state=None) -> None:
         if state is not None:
             self._show_bbox = state
@@ -193,9 +269,13 @@ class Root(ABC):
         self._vertices.release()
 
         self._vao.release()
+        self._damage_vertices.release()
+        self._damage_vao.release()
 
-        self._mem_texture.release()
-        self._framebuffer.release()
+        self._mem_uv.release()
+        FramebufferManager(self.ctx).release_framebuffer(self._mem_texture, self._framebuffer)
 
         self._widget.release()
         self._widget = None
+
+        self.batcher.release()
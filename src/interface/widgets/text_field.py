@@ -1,25 +1,62 @@
 from __future__ import annotations
 from ..misc.types import Child
 
-import moderngl as mgl
+from bisect import bisect_right
+
+import pygame as pg
 
 from ..layouts.gui_layout import GUILayout
-from .text_render import _Char, Font
+from .text_render import _Char, AtlasRegion, Font, Glyph, TextRun
+
+
+def _common_prefix(a: str, b: str) -> int:
+    if b.startswith(a):
+        return len(a)
+    if a.startswith(b):
+        return len(b)
+
+    # binary search over slice comparisons, which run in C
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[:mid] == b[:mid]:
+            low = mid
+        else:
+            high = mid - 1
+
+    return low
 
 
 class TextField(GUILayout):
+    """
+        multi-line text kept as a plain string and the indexes where its rows start;
+        chars are made and drawn only for the rows in view, so long texts scroll at frame rate
+    """
+
     def __init__(self, font: Font, line='', **kwargs):
         super().__init__(**kwargs)
 
         self._font = font
 
-        self._pen = (0, 0)
-        self.visible_widgets_count = 0
-
         self.char_size = self._font.char_size
         self.line_height = self.char_size
 
-        self._bitmap_textures: dict[str: mgl.Texture] = {}
+        self._line = ''
+        # index of the first char of every row, wrapped at _wrap_width
+        self._row_starts = [0]
+        self._wrap_width = self.width
+        self._scroll = 0
+        self._drag_rest = 0
+
+        self._symbols: dict[str, tuple[Glyph, AtlasRegion]] = {}
+        # (start, stop, color) of set_color calls, sorted and not overlapping; applied again to rows that come into view
+        self._color_spans: list[tuple[int, int, tuple[float, float, float]]] = []
+
+        # chars of line[_window[0]:_window[1]], the rows in view
+        self._window = (0, 0)
+        self._chars: list[_Char] = []
+        self.visible_widgets_count = 0
+        self._text_run = TextRun(self.ctx, sdf=font.sdf)
 
         self.line = line
 
@@ -31,82 +68,203 @@ class TextField(GUILayout):
 
     @line.setter
     def line(self, line: str):
-        self._release_widgets(keep_texture=True)
+        common = _common_prefix(self._line, line)
 
+        # new text is drawn with the default color, like TextLine
+        self._color_spans = []
         self._line = line
-        for symbol in line:
-            self._add_char(symbol)
+        self._wrap(common)
+        self._scroll = min(self._scroll, self._max_scroll)
+        self._materialize(changed=common)
+
+        self.redraw_request()
+
+    @property
+    def rows_count(self) -> int:
+        return len(self._row_starts)
 
-    def _add_char(self, symbol: str) -> None:
-        glyph = self._font.get_glyph(ord(symbol))
+    @property
+    def visible_rows(self) -> int:
+        return max(1, self.height // self.line_height)
 
-        if self._pen[0] + glyph.size[0] + glyph.offset[0] > self.size[0]:
-            self._pen = (0, self._pen[1] + self.line_height)
+    @property
+    def scroll(self) -> int:
+        """
+            index of the top row in view
+        """
+        return self._scroll
+
+    @scroll.setter
+    def scroll(self, value: int):
+        value = max(0, min(value, self._max_scroll))
+        if value != self._scroll:
+            self._scroll = value
+            self._materialize()
+            self.redraw_request()
 
-        if symbol not in self._bitmap_textures:
-            self._bitmap_textures[symbol] = self.ctx.texture(size=glyph.size, data=glyph.bitmap, components=1)
+    @property
+    def _max_scroll(self) -> int:
+        return max(0, self.rows_count - self.visible_rows)
 
-        char = _Char(parent=self, glyph=glyph, texture=self._bitmap_textures[symbol])
-        self._update_char_pos(char)
+    def scroll_by(self, rows: int) -> None:
+        self.scroll = self._scroll + rows
 
-        self.visible_widgets_count += 1
-        self.redraw_request()
+    def scroll_to_end(self) -> None:
+        self.scroll = self.rows_count
 
-    # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
+    # ///////////////////////////////////////////////////// ROWS ///////////////////////////////////////////////////////
 
-    def _update_layout(self) -> None:
-        self.visible_widgets_count = 0
+    def _symbol(self, symbol: str) -> tuple[Glyph, AtlasRegion]:
+        if symbol not in self._symbols:
+            code = ord(symbol)
+            self._symbols[symbol] = (self._font.get_glyph(code), self._font.get_region(self.ctx, code))
 
-        self._pen = [0, self.line_height]
+        return self._symbols[symbol]
 
-        for char in self._widgets:
-            if self._pen[0] + char.glyph.size[0] + char.glyph.offset[0] > self.size[0]:
+    def _row_end(self, row: int) -> int:
+        return self._row_starts[row + 1] if row + 1 < len(self._row_starts) else len(self._line)
 
-                if self._pen[1] > self.height:
-                    break
-                self._pen = (0, self._pen[1] + self.line_height)
+    def _wrap(self, start: int = 0) -> None:
+        """
+            finds the row starts from the row before the one holding start, earlier rows can not change
+        """
+        row = max(0, bisect_right(self._row_starts, start) - 2)
+        row_starts = self._row_starts[:row + 1]
 
-            self._update_char_pos(char)
+        line = self._line
+        width = self._wrap_width
+        pen = 0
+        for i in range(row_starts[-1], len(line)):
+            symbol = line[i]
+            glyph = self._symbol(symbol)[0]
 
-            self.visible_widgets_count += 1
+            if pen > 0 and pen + glyph.size[0] + glyph.offset[0] > width:
+                row_starts.append(i)
+                pen = 0
 
-    def _update_char_pos(self, char: _Char):
-        char.pos = (self._pen[0] + char.glyph.offset[0],
-                    self._pen[1] - char.glyph.offset[1] - char.glyph.size[1])
+            pen += glyph.horizontal_advance
 
-        self._pen = (self._pen[0] + char.glyph.horizontal_advance, self._pen[1])
+            if symbol == '\r' or symbol == '\n':
+                row_starts.append(i + 1)
+                pen = 0
 
-        if char.glyph.symbol == '\r' or char.glyph.symbol == '\n':
-            self._pen = (0, self._pen[1] + self.line_height)
+        self._row_starts = row_starts
+
+    # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
+
+    def _update_layout(self) -> None:
+        if self.width != self._wrap_width:
+            self._wrap_width = self.width
+            self._wrap()
+
+        self._scroll = min(self._scroll, self._max_scroll)
+        self._materialize()
+
+    def _materialize(self, changed: int = 0) -> None:
+        """
+            makes the chars of the rows in view; ones before changed are kept if the view starts at the same char
+        """
+        # one more row than fits, the bottom one may be partly visible
+        end_row = min(self._scroll + self.visible_rows + 1, self.rows_count)
+        first, last = self._row_starts[self._scroll], self._row_end(end_row - 1)
+
+        # chars are rebuilt from the start of the row holding changed, positions before it stay valid
+        keep = 0
+        if first == self._window[0] and changed > first:
+            row = bisect_right(self._row_starts, min(changed, last), lo=self._scroll) - 1
+            keep = min(self._row_starts[row] - first, len(self._chars))
+        row = bisect_right(self._row_starts, first + keep, lo=self._scroll) - 1
+
+        chars = self._chars[:keep]
+        for r in range(row, end_row):
+            pen = [0, self.line_height * (r - self._scroll + 1)]
+            for symbol in self._line[max(self._row_starts[r], first + keep):self._row_end(r)]:
+                glyph, region = self._symbol(symbol)
+                chars.append(_Char(glyph=glyph, region=region,
+                                   pos=(pen[0] + glyph.offset[0], pen[1] - glyph.offset[1] - glyph.size[1])))
+                pen[0] += glyph.horizontal_advance
+
+        self._window = (first, last)
+        self._chars = chars
+        self.visible_widgets_count = len(chars)
+
+        self._text_run.set_chars(chars, keep)
+        spans = self._color_spans
+        # the span before the first one starting in view may reach into it
+        for i in range(max(0, bisect_right(spans, (first,)) - 1), bisect_right(spans, (last,))):
+            start, stop, color = spans[i]
+            start, stop = max(start, first), min(stop, last)
+            if start < stop:
+                self._text_run.set_color(slice(start - first, stop - first), color)
 
     # /////////////////////////////////////////////////// DISPLAY //////////////////////////////////////////////////////
 
     def _redraw(self) -> None:
-        i = 0
-        for widget in self._widgets:
-            widget.draw()
+        self._text_run.render(self.size, count=self.visible_widgets_count)
 
-            i += 1
-            if i == self.visible_widgets_count:
-                break
+        if self._show_bbox:
+            self._text_run.render_bbox(self.size, count=self.visible_widgets_count)
 
     def set_color(self, i: int | slice, color: tuple[float, float, float]) -> None:
         if isinstance(i, int):
-            self._widgets[i].color = color
-        elif isinstance(i, slice):
-            for w in self._widgets[i]:
-                w.color = color
+            i = range(len(self._line))[i]
+            i = slice(i, i + 1)
+        start, stop, _ = i.indices(len(self._line))
+        if start >= stop:
+            return
+        self._add_span(start, stop, color)
+
+        first, last = self._window
+        start, stop = max(start, first), min(stop, last)
+        if start < stop:
+            self._text_run.set_color(slice(start - first, stop - first), color)
+            self.redraw_request()
+
+    def _add_span(self, start: int, stop: int, color: tuple[float, float, float]) -> None:
+        """
+            replaces the colors of the spans under start:stop, cutting the ones that stick out
+        """
+        spans = self._color_spans
+        low = max(0, bisect_right(spans, (start,)) - 1)
+        high = bisect_right(spans, (stop,))
+
+        new = []
+        for span_start, span_stop, span_color in spans[low:high]:
+            if span_start < start:
+                new.append((span_start, min(span_stop, start), span_color))
+            if span_stop > stop:
+                new.append((max(span_start, stop), span_stop, span_color))
+        new.append((start, stop, color))
+        new.sort(key=lambda span: span[0])
+
+        spans[low:high] = new
 
     def remove_last(self) -> None:
-        if len(self._widgets) > 0:
+        if len(self._line) > 0:
             self.line = self.line[:-1]
 
     # //////////////////////////////////////////////////// INPUT ///////////////////////////////////////////////////////
 
     def _mouse_down(self, button_name: str, mouse_pos: tuple[int, int], count: int) -> Child | None:
+        self._drag_rest = 0
         return self
 
+    def _mouse_drag(self, button_name: str, mouse_pos: tuple[int, int], rel: tuple[int, int]) -> Child | None:
+        # dragging the text up shows the rows below
+        self._drag_rest += rel[1]
+        rows = int(self._drag_rest / self.line_height)
+        if rows:
+            self._drag_rest -= rows * self.line_height
+            self.scroll_by(-rows)
+
     def _keyboard_press(self, key: int, unicode: str) -> None:
+        if key == pg.K_PAGEUP:
+            self.scroll_by(-self.visible_rows)
+            return
+        elif key == pg.K_PAGEDOWN:
+            self.scroll_by(self.visible_rows)
+            return
+
         if unicode == '\b':  # BACKSPACE
             self.remove_last()
         elif unicode == '\x1b':  # ESCAPE
@@ -116,11 +274,12 @@ class TextField(GUILayout):
         else:
             self.line += unicode
 
+        # typing happens at the end of the text, which is kept in view
+        self.scroll_to_end()
+
     # /////////////////////////////////////////////////// RELEASE //////////////////////////////////////////////////////
 
     def release(self, keep_texture=False):
-        if not keep_texture:
-            for texture in self._bitmap_textures.values():
-                texture.release()
+        self._text_run.release()
 
         super().release(keep_texture)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 from ..misc.types import Child
 
+import copy
 from typing import Callable
 
 from .text_line import TextLine
@@ -14,33 +15,29 @@ class TextInput(TextLine):
         if not 'line' in kwargs or kwargs['line'] == '':
             kwargs['line'] = self.placeholder
 
+        self._text_cursor: _Char | None = None
+
         super().__init__(**kwargs)
 
-        glyph = self._font.get_glyph(ord('|'))
+        # fonts are shared, so the cursor gets its own copy of the glyph to adjust
+        self._text_cursor = self._make_char('|')
+        glyph = self._text_cursor.glyph = copy.copy(self._text_cursor.glyph)
         glyph.offset = (0, glyph.offset[1])
         glyph.horizontal_advance = glyph.size[0]
-        texture = self.ctx.texture(size=glyph.size, data=glyph.bitmap, components=1)
-        self._text_cursor = _Char(parent=self, glyph=glyph, texture=texture)
+        self._layout_chars()
 
         self._validate_func = validate_func
 
-        self._widgets = [self._widgets[-1]] + self._widgets[:-1]
-
-    def add(self, widget: Child) -> None:
-        super().add(widget)
-        if len(self._widgets) > 1:
-            self._widgets[-2], self._widgets[-1] = self._widgets[-1], self._widgets[-2]
-
     @property
     def placeholder(self):
         return self._placeholder
 
-    @TextLine.line.setter
-    def line(self, line: str):
-        TextLine.line.fset(self, line)
+    def _run_chars(self) -> list[_Char]:
+        # the cursor is kept as the last instance of the run and drawn only in focus
+        if self._text_cursor is None:
+            return self._chars
 
-        if len(self._widgets) > 0:
-            self._update_char_pos(self._widgets[-1])
+        return self._chars + [self._text_cursor]
 
     # //////////////////////////////////////////////////// INPUT ///////////////////////////////////////////////////////
 
@@ -79,42 +76,15 @@ class TextInput(TextLine):
 
     # /////////////////////////////////////////////////// DISPLAY //////////////////////////////////////////////////////
 
-    def set_color(self, i: int | slice, color: tuple[float, float, float]) -> None:
-        if isinstance(i, int):
-            self._widgets[i].color = color
-        elif isinstance(i, slice):
-            for w in self._widgets[i]:
-                w.color = color
-
     def _redraw(self):
-        for widget in self._widgets[:-1]:
-            widget.draw()
+        count = len(self._chars) + int(self.is_in_focus)
+        self._text_run.render(self.size, count=count)
 
-        if self.is_in_focus:
-            self._text_cursor.draw()
+        if self._show_bbox:
+            self._text_run.render_bbox(self.size, count=count)
 
     # /////////////////////////////////////////////////// RELEASE //////////////////////////////////////////////////////
 
     def remove_last(self) -> None:
-        if len(self._widgets) > 1:
-            self._line = self._line[:-1]
-            x = self._widgets.pop(-2)
-
-            self._pen[0] -= x.glyph.horizontal_advance + self._text_cursor.glyph.horizontal_advance
-            self._update_char_pos(self._text_cursor)
-
-            x.release(keep_texture=True)
-
-            self.redraw_request()
-
-    def _release_widgets(self, keep_texture=False):
-        if self._widgets:
-            for widget in self._widgets[:-2]:
-                widget.release(keep_texture)
-
-            self._widgets = [self._widgets[-1]]
-            self._widget_ids = {}
-
-    def release(self, keep_texture=False):
-        self._text_cursor.release(keep_texture)
-        super().release(keep_texture)
+        if len(self._chars) > 0:
+            self.line = self._line[:-1]
@@ -1,27 +1,29 @@
 from __future__ import annotations
 from ..misc.types import Child
 
-import moderngl as mgl
+from typing import Sequence
 
 from ..layouts.gui_layout import GUILayout
-from .text_render import _Char, Font
+from .text_render import _Char, Font, TextRun
 
 
 class TextLine(GUILayout):
-    def __init__(self, font: Font, line='', **kwargs):
+    def __init__(self, font: Font, line='', palette: Sequence[tuple[float, float, float]] = (), **kwargs):
         super().__init__(**kwargs)
 
         self._font = font
 
         self._pen = [0, 0]
-        self.visible_widgets_count = 0
 
         self._auto_size = self.width_hint == self.base_width is None and self.height_hint == self.base_height is None
 
         self.char_size = self._font.char_size
         self.line_height = self.char_size
 
-        self._bitmap_textures: dict[str: mgl.Texture] = {}
+        self._line = ''
+        self._chars: list[_Char] = []
+        self._text_run = TextRun(self.ctx, sdf=font.sdf)
+        self._text_run.palette = palette
 
         self.line = line
 
@@ -33,41 +35,56 @@ class TextLine(GUILayout):
 
     @line.setter
     def line(self, line: str):
-        self._pen = [0, self.line_height]
-        self._release_widgets(keep_texture=True)
+        # chars of the common prefix keep their records and geometry, only the changed tail is laid out again;
+        # the colors and states of the whole line go back to the defaults, it is new text
+        common = 0
+        for old, new in zip(self._line, line):
+            if old != new:
+                break
+            common += 1
 
         self._line = line
-        for symbol in line:
-            self._add_char(symbol)
+        self._chars = self._chars[:common] + [self._make_char(symbol) for symbol in line[common:]]
+
+        self._layout_chars(start=common)
 
         if self._auto_size:
-            self._base_size = (self._pen[0], int(self.char_size * 1.5))
+            self.measure_request()
 
         self.redraw_request()
 
-    def _add_char(self, symbol: str) -> None:
-        glyph = self._font.get_glyph(ord(symbol))
-
-        if symbol not in self._bitmap_textures:
-            self._bitmap_textures[symbol] = self.ctx.texture(size=glyph.size, data=glyph.bitmap, components=1)
-            self._bitmap_textures[symbol].filter = (mgl.NEAREST, mgl.NEAREST)
+    def _make_char(self, symbol: str) -> _Char:
+        code = ord(symbol)
+        return _Char(glyph=self._font.get_glyph(code), region=self._font.get_region(self.ctx, code))
 
-        char = _Char(parent=self, glyph=glyph, texture=self._bitmap_textures[symbol])
-        self._update_char_pos(char)
-
-        self.redraw_request()
+    def _run_chars(self) -> list[_Char]:
+        return self._chars
 
     # /////////////////////////////////////////////////// UPDATE ///////////////////////////////////////////////////////
 
-    def _update_layout(self) -> None:
-        self._pen = [0, self.line_height]
+    def _layout_chars(self, start: int = 0) -> None:
+        chars = self._run_chars()
 
-        for char in self._widgets:
+        if start == 0:
+            self._pen = [0, self.line_height]
+        else:
+            prev = chars[start - 1]
+            self._pen = [prev.pos[0] - prev.glyph.offset[0] + prev.glyph.horizontal_advance, self.line_height]
+
+        for char in chars[start:]:
             self._update_char_pos(char)
 
+        self._text_run.set_chars(chars, start)
+
+    def _measure(self) -> None:
+        # an auto sized line is as long as the pen went
         if self._auto_size:
             self._base_size = (self._pen[0], int(self.line_height + self.char_size / 2))
 
+    def _update_layout(self) -> None:
+        # char positions do not depend on the size of the line
+        pass
+
     def _update_char_pos(self, char: _Char):
         char.pos = (self._pen[0] + char.glyph.offset[0],
                     self._pen[1] - char.glyph.offset[1] - char.glyph.size[1])
@@ -77,18 +94,33 @@ class TextLine(GUILayout):
     # /////////////////////////////////////////////////// DISPLAY //////////////////////////////////////////////////////
 
     def set_color(self, i: int | slice, color: tuple[float, float, float]) -> None:
-        if isinstance(i, int):
-            self._widgets[i].color = color
-        elif isinstance(i, slice):
-            for w in self._widgets[i]:
-                w.color = color
+        self._text_run.set_color(self._char_range(i), color)
+        self.redraw_request()
+
+    def set_state(self, i: int | slice, state: int) -> None:
+        """
+            colors chars with palette[state - 1]; state 0 goes back to the color given by set_color
+        """
+        self._text_run.set_state(self._char_range(i), state)
         self.redraw_request()
 
+    def _char_range(self, i: int | slice) -> slice:
+        # indexes of the line, which may be fewer than the instances of the run
+        if isinstance(i, int):
+            i = range(len(self._chars))[i]
+            return slice(i, i + 1)
+
+        return slice(*i.indices(len(self._chars))[:2])
+
+    def _redraw(self):
+        self._text_run.render(self.size)
+
+        if self._show_bbox:
+            self._text_run.render_bbox(self.size)
+
     # /////////////////////////////////////////////////// RELEASE //////////////////////////////////////////////////////
 
     def release(self, keep_texture=False):
-        if not keep_texture:
-            for texture in self._bitmap_textures.values():
-                texture.release()
+        self._text_run.release()
 
         super().release(keep_texture)
@@ -1,19 +1,38 @@
 from __future__ import annotations
 
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+
 import moderngl as mgl
 import freetype as ft
 import numpy as np
 import glm
 
 from ..misc.mglmanagers import ProgramManager, BufferManager
-from .gui_object import GUIObject
-from ...settings import MONITOR_DPI, BASE_DIR
+from ..misc.glyph_cache import GlyphCache, GlyphData, DISTANCE_FIELD_FLAG
+from ...settings import BASE_DIR, DEFAULT_DPI, get_monitor_dpi
 
 
 class Glyph:
-    def __init__(self, code: int, face: ft.Face):
+    def __init__(self, code: int, face: ft.Face | None = None, data: GlyphData | None = None,
+                 distance_field: bool = False):
         self.symbol = chr(code)
-        face.load_char(self.symbol)
+
+        if data is not None:
+            self.bitmap = data.bitmap
+            self.size = data.size
+            self.offset = data.offset
+            self.horizontal_advance = data.horizontal_advance
+            self.vertical_advance = data.vertical_advance
+            return
+
+        if distance_field:
+            face.load_char(self.symbol, ft.FT_LOAD_DEFAULT)
+            face.glyph.render(ft.FT_RENDER_MODES['FT_RENDER_MODE_SDF'])
+        else:
+            face.load_char(self.symbol)
 
         ft_glyph = face.glyph
         self.bitmap = np.array(ft_glyph.bitmap.buffer, dtype='u1')
@@ -25,57 +44,462 @@ class Glyph:
         self.horizontal_advance = ft_glyph.linearHoriAdvance >> 16
         self.vertical_advance = ft_glyph.linearVertAdvance >> 16
 
+    def scaled(self, factor: float) -> Glyph:
+        """
+            the same bitmap drawn factor times larger; advances stay whole pixels so pens do too
+        """
+        return Glyph(ord(self.symbol), data=GlyphData(self.bitmap, (self.size[0] * factor, self.size[1] * factor),
+                                                      (self.offset[0] * factor, self.offset[1] * factor),
+                                                      round(self.horizontal_advance * factor),
+                                                      round(self.vertical_advance * factor)))
+
 
 class Font:
-    def __init__(self, name: str, char_size: int):
+    _instances: weakref.WeakSet[Font] = weakref.WeakSet()
+
+    # glyphs rendered as signed distance fields instead of coverage bitmaps
+    _distance_field = False
+    _atlas_filter = mgl.NEAREST
+
+    def __init__(self, name: str, char_size: int, sdf: bool = False, max_glyphs: int | None = None,
+                 max_words: int | None = None):
+        Font._instances.add(self)
+
         self.name = name
         self.char_size = char_size
+        self.sdf = sdf
+
+        # past max_glyphs the least recently used glyph is dropped, a later miss reads it back from the disk cache;
+        # this bounds the bitmaps on the CPU only, the atlas keeps a region for every glyph it was asked for
+        self.max_glyphs = max_glyphs
+        self.loaded_glyphs: OrderedDict[int, Glyph] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # past max_words the word measured first is dropped
+        self.max_words = max_words
+        self._word_widths: dict[str, int] = {}
+        self._atlases: dict[mgl.Context, GlyphAtlas] = {}
+        # lines are pre-generated on worker threads, and freetype faces are not thread-safe
+        self._lock = threading.Lock()
 
-        self.face = ft.Face(f'{BASE_DIR}/data/fonts/{name}.ttf')
+        if sdf:
+            # every sdf Font of a typeface scales the glyphs of one shared distance field
+            self._field = DistanceField.get(name)
+            self._scale = char_size / DistanceField.SIZE
+            return
+
+        path = f'{BASE_DIR}/data/fonts/{name}.ttf'
+        self.face = ft.Face(path)
         w = h = char_size << 6
-        self.face.set_char_size(width=w, height=h, hres=int(MONITOR_DPI), vres=int(MONITOR_DPI))
+        # queried here and not on the first rasterized glyph: the dpi is part of the key of the disk cache,
+        # so even a glyph read back from it needs the dpi, and the logo draws its glyphs on the first frame
+        dpi = int(get_monitor_dpi())
+        if dpi <= 0:
+            # no primary monitor was found
+            dpi = DEFAULT_DPI
+        self.face.set_char_size(width=w, height=h, hres=dpi, vres=dpi)
+
+        # glyphs rasterized by earlier runs come from the on-disk cache
+        self._glyph_cache = GlyphCache()
+        self._cache_key = (self._glyph_cache.font_hash(path),
+                           char_size | (DISTANCE_FIELD_FLAG if self._distance_field else 0), dpi)
 
-        self.loaded_glyphs = {}
+    @classmethod
+    def active(cls) -> list[Font]:
+        return list(cls._instances)
 
     def get_glyph(self, code: int) -> Glyph:
-        if code not in self.loaded_glyphs:
-            self.loaded_glyphs[code] = Glyph(code, self.face)
+        with self._lock:
+            glyph = self.loaded_glyphs.get(code)
+            if glyph is not None:
+                self.hits += 1
+                self.loaded_glyphs.move_to_end(code)
+                return glyph
 
-        return self.loaded_glyphs[code]
+            self.misses += 1
+            glyph = self.loaded_glyphs[code] = self._load_glyph(code)
+            if self.max_glyphs is not None and len(self.loaded_glyphs) > self.max_glyphs:
+                self.loaded_glyphs.popitem(last=False)
+                self.evictions += 1
 
+        return glyph
 
-class _Char(GUIObject):
-    def __init__(self, glyph: Glyph, color: tuple[float, float, float] = (1, 1, 1), **kwargs):
-        self._color = color
-        self._color_buffer = kwargs['parent'].ctx.buffer(glm.vec3(self._color))
+    def _load_glyph(self, code: int) -> Glyph:
+        if self.sdf:
+            return self._field.get_glyph(code).scaled(self._scale)
 
-        self._glyph = glyph
-        super().__init__(size=self._glyph.size,
-                         program=ProgramManager(kwargs['parent'].ctx).get('text_render'), **kwargs)
+        data = self._glyph_cache.get(self._cache_key, code)
+        if data is not None:
+            return Glyph(code, data=data)
 
-    def _get_vao(self) -> mgl.VertexArray:
-        return self.ctx.vertex_array(self._program,
-                                     [
-                                         (self._vertices, '2f /v', 'in_position'),
-                                         (BufferManager(self.ctx).get('UV'), '2f /v', 'in_texture_cords'),
-                                         (self._color_buffer, '3f /i', 'in_color')
-                                     ])
+        glyph = Glyph(code, self.face, distance_field=self._distance_field)
+        self._glyph_cache.append(self._cache_key, code, glyph)
 
-    @property
-    def glyph(self):
-        return self._glyph
+        return glyph
+
+    def word_width(self, word: str) -> int:
+        width = self._word_widths.get(word)
+        if width is None:
+            width = sum(self.get_glyph(ord(i)).horizontal_advance for i in word)
+
+            with self._lock:
+                self._word_widths[word] = width
+                if self.max_words is not None and len(self._word_widths) > self.max_words:
+                    del self._word_widths[next(iter(self._word_widths))]
+
+        return width
+
+    def get_atlas(self, ctx: mgl.Context) -> GlyphAtlas:
+        if self.sdf:
+            return self._field.get_atlas(ctx)
+
+        if ctx not in self._atlases:
+            self._atlases[ctx] = GlyphAtlas(ctx, filter=self._atlas_filter)
+
+        return self._atlases[ctx]
+
+    def get_region(self, ctx: mgl.Context, code: int) -> AtlasRegion:
+        if self.sdf:
+            return self._field.get_region(ctx, code)
+
+        return self.get_atlas(ctx).get(self.get_glyph(code))
+
+    def release(self, ctx: mgl.Context) -> None:
+        """
+            releases the atlas of ctx; the distance field of an sdf Font is shared and kept
+        """
+        if ctx in self._atlases:
+            self._atlases.pop(ctx).release()
+
+
+class DistanceField(Font):
+    """
+        a typeface rendered once as signed distance fields at SIZE, in an atlas with linear filtering;
+        shared by every sdf Font of the typeface, whatever its char_size.
+        the fields have one channel, glyphs made of overlapping contours come out with holes and specks,
+        so only typefaces whose fields match their bitmaps should be used with sdf
+    """
+    SIZE = 64
+
+    _distance_field = True
+    _atlas_filter = mgl.LINEAR
+
+    _fields: dict[str, DistanceField] = {}
+    _fields_lock = threading.Lock()
+
+    def __init__(self, name: str):
+        super().__init__(name, self.SIZE)
+
+    @classmethod
+    def get(cls, name: str) -> DistanceField:
+        with cls._fields_lock:
+            if name not in cls._fields:
+                cls._fields[name] = cls(name)
+
+        return cls._fields[name]
+
+
+@dataclass
+class AtlasRegion:
+    texture: mgl.Texture
+    uv_rect: tuple[float, float, float, float]  # u, v, width, height
+
+
+class GlyphAtlas:
+    """
+        glyph bitmaps of one Font packed into shared single channel textures, shelf by shelf;
+        a new page is started when the current one is full
+    """
+
+    def __init__(self, ctx: mgl.Context, page_size: int = 1024, padding: int = 1, filter: int = mgl.NEAREST):
+        self.ctx = ctx
+        self.page_size = page_size
+        self.padding = padding
+        self.filter = filter
+
+        self.pages: list[mgl.Texture] = []
+        self.regions: dict[str, AtlasRegion] = {}
+
+        self._pen = (0, 0)
+        self._shelf_height = 0
+
+    def _add_page(self) -> None:
+        texture = self.ctx.texture(size=(self.page_size, self.page_size), components=1)
+        texture.filter = (self.filter, self.filter)
+        self.pages.append(texture)
+
+        self._pen = (0, 0)
+        self._shelf_height = 0
+
+    def _allocate(self, size: tuple[int, int]) -> tuple[int, int]:
+        w, h = size[0] + self.padding, size[1] + self.padding
+        if w > self.page_size or h > self.page_size:
+            raise ValueError(f'Glyph of size {size} does not fit in atlas page of size {self.page_size}')
+
+        if not self.pages:
+            self._add_page()
+
+        x, y = self._pen
+        if x + w > self.page_size:
+            x, y = 0, y + self._shelf_height
+            self._shelf_height = 0
+
+        if y + h > self.page_size:
+            self._add_page()
+            x, y = self._pen
+
+        self._pen = (x + w, y)
+        self._shelf_height = max(self._shelf_height, h)
+
+        return x, y
+
+    def get(self, glyph: Glyph) -> AtlasRegion:
+        if glyph.symbol not in self.regions:
+            if glyph.size[0] == 0 or glyph.size[1] == 0:
+                if not self.pages:
+                    self._add_page()
+                self.regions[glyph.symbol] = AtlasRegion(self.pages[-1], (0., 0., 0., 0.))
+            else:
+                x, y = self._allocate(glyph.size)
+                page = self.pages[-1]
+                page.write(glyph.bitmap, viewport=(x, y, glyph.size[0], glyph.size[1]))
+
+                self.regions[glyph.symbol] = AtlasRegion(page, (x / self.page_size, y / self.page_size,
+                                                                glyph.size[0] / self.page_size,
+                                                                glyph.size[1] / self.page_size))
+
+        return self.regions[glyph.symbol]
+
+    def release(self) -> None:
+        for page in self.pages:
+            page.release()
+
+        self.pages = []
+        self.regions = {}
+
+
+@dataclass(slots=True)
+class _Char:
+    glyph: Glyph
+    region: AtlasRegion
+    pos: tuple[int, int] = (0, 0)
+
+
+class TextRun:
+    """
+        instanced renderer for a sequence of chars, drawn with one call per atlas page.
+        geometry, colors and palette states are separate per-instance buffers, so recoloring
+        a slice is one NumPy assignment and one ranged write of only that attribute
+    """
+
+    # in_rect (4f) | in_uv_rect (4f) | in_page (1f)
+    GEOMETRY_FLOATS = 9
+    # state 0 draws the char's own color, state k draws palette[k - 1]
+    PALETTE_SIZE = 15
+
+    def __init__(self, ctx: mgl.Context, capacity: int = 64, color: tuple[float, float, float] = (1, 1, 1),
+                 sdf: bool = False):
+        self.ctx = ctx
+        self._program = ProgramManager(ctx).get('text_render')
+        # atlas pages hold distance fields, edges are reconstructed in the fragment shader
+        self.sdf = sdf
+
+        self.default_color = color
+        self._palette = np.zeros((self.PALETTE_SIZE, 3), dtype='f4')
+
+        self._geometry = np.zeros((0, self.GEOMETRY_FLOATS), dtype='f4')
+        self._colors = np.zeros((0, 3), dtype='f4')
+        self._states = np.zeros(0, dtype='u1')
+        # instances start:stop may have a color or state other than the default, set_chars resets only those
+        self._recolored = (0, 0)
+        self._pages: list[mgl.Texture] = []
+
+        self._capacity = 0
+        self._geometry_buffer = self._color_buffer = self._state_buffer = None
+        self._vao = None
+        # outlines of the char rects for the bbox debug view, made on first use
+        self._bbox_vao = None
+        self._reserve(capacity)
+
+    def __len__(self) -> int:
+        return len(self._geometry)
+
+    # //////////////////////////////////////////////////// PALETTE /////////////////////////////////////////////////////
 
     @property
-    def color(self) -> tuple[float, float, float]:
-        return self._color
+    def palette(self) -> list[tuple[float, float, float]]:
+        return [tuple(c) for c in self._palette]
 
-    @color.setter
-    def color(self, value: tuple[float, float, float]):
-        self._color = value
-        self._color_buffer.write(glm.vec3(self._color))
+    @palette.setter
+    def palette(self, value):
+        if len(value) > self.PALETTE_SIZE:
+            raise ValueError(f'Palette of {len(value)} colors, at most {self.PALETTE_SIZE} are supported')
 
-    def release(self, keep_texture=False):
-        self._color_buffer.release()
+        self._palette[:] = 0
+        if len(value):
+            self._palette[:len(value)] = value
+
+    # //////////////////////////////////////////////////// BUFFERS /////////////////////////////////////////////////////
+
+    def _reserve(self, count: int) -> bool:
+        """
+            makes room for count instances; True if the buffers were recreated and lost their content
+        """
+        if count <= self._capacity:
+            return False
+
+        capacity = max(count, self._capacity * 2)
+        if self._bbox_vao is not None:
+            self._bbox_vao.release()
+            self._bbox_vao = None
+        if self._vao is not None:
+            self._vao.release()
+            self._geometry_buffer.release()
+            self._color_buffer.release()
+            self._state_buffer.release()
+
+        self._capacity = capacity
+        self._geometry_buffer = self.ctx.buffer(reserve=capacity * self.GEOMETRY_FLOATS * 4)
+        self._color_buffer = self.ctx.buffer(reserve=capacity * 3 * 4)
+        self._state_buffer = self.ctx.buffer(reserve=capacity)
+        self._vao = self.ctx.vertex_array(self._program,
+                                          [
+                                              (BufferManager(self.ctx).get('UV'), '2f /v', 'in_texture_cords'),
+                                              (self._geometry_buffer, '4f 4f 1f /i',
+                                               'in_rect', 'in_uv_rect', 'in_page'),
+                                              (self._color_buffer, '3f /i', 'in_color'),
+                                              (self._state_buffer, '1u1 /i', 'in_state')
+                                          ])
+        return True
+
+    def _write_all(self) -> None:
+        if len(self):
+            self._geometry_buffer.write(self._geometry.tobytes())
+            self._color_buffer.write(self._colors.tobytes())
+            self._state_buffer.write(self._states.tobytes())
+
+    # ///////////////////////////////////////////////////// CHARS //////////////////////////////////////////////////////
 
-        super().release(keep_texture)
+    def _geometry_rows(self, chars: list[_Char]) -> np.ndarray:
+        for char in chars:
+            if char.region.texture not in self._pages:
+                self._pages.append(char.region.texture)
 
+        return np.array([(*char.pos, *char.glyph.size, *char.region.uv_rect, self._pages.index(char.region.texture))
+                         for char in chars], dtype='f4').reshape(-1, self.GEOMETRY_FLOATS)
+
+    def set_chars(self, chars: list[_Char], start: int = 0) -> None:
+        """
+            rebuilds the geometry of chars[start:], the geometry before start is kept as it is;
+            the chars are new text, so all of them are drawn with the default color and state 0.
+            only the tail from start and the instances recolored since the last call are written
+        """
+        start = min(start, len(self))
+        if start == 0:
+            self._pages = []
+
+        reset = min(start, self._recolored[0]) if self._recolored[0] < self._recolored[1] else start
+        self._recolored = (0, 0)
+
+        rows = self._geometry_rows(chars[start:])
+        self._geometry = np.concatenate((self._geometry[:start], rows))
+        self._colors = np.concatenate((self._colors[:reset], np.tile(np.array(self.default_color, 'f4'),
+                                                                      (len(self) - reset, 1))))
+        self._states = np.concatenate((self._states[:reset], np.zeros(len(self) - reset, dtype='u1')))
+
+        if self._reserve(len(self)):
+            self._write_all()
+        else:
+            if len(rows):
+                self._geometry_buffer.write(rows.tobytes(), offset=start * self.GEOMETRY_FLOATS * 4)
+            if reset < len(self):
+                self._color_buffer.write(self._colors[reset:].tobytes(), offset=reset * 3 * 4)
+                self._state_buffer.write(self._states[reset:].tobytes(), offset=reset)
+
+    def update_geometry(self, chars: list[_Char]) -> None:
+        """
+            rewrites positions of the same chars after a relayout, colors and states are kept
+        """
+        self._pages = []
+        self._geometry = self._geometry_rows(chars)
+        if len(self):
+            self._geometry_buffer.write(self._geometry.tobytes())
+
+    @staticmethod
+    def _range(i: int | slice, length: int) -> tuple[int, int]:
+        if isinstance(i, int):
+            i = slice(i, i + 1)
+        start, stop, _ = i.indices(length)
+
+        return start, max(start, stop)
+
+    def set_color(self, i: int | slice, color: tuple[float, float, float]) -> None:
+        start, stop = self._range(i, len(self))
+        if start == stop:
+            return
+
+        self._colors[start:stop] = color
+        self._states[start:stop] = 0
+        self._mark_recolored(start, stop)
+
+        self._color_buffer.write(self._colors[start:stop].tobytes(), offset=start * 3 * 4)
+        self._state_buffer.write(self._states[start:stop].tobytes(), offset=start)
+
+    def set_state(self, i: int | slice, state: int) -> None:
+        start, stop = self._range(i, len(self))
+        if start == stop:
+            return
+
+        self._states[start:stop] = state
+        self._mark_recolored(start, stop)
+        self._state_buffer.write(self._states[start:stop].tobytes(), offset=start)
+
+    def _mark_recolored(self, start: int, stop: int) -> None:
+        if self._recolored[0] < self._recolored[1]:
+            start, stop = min(start, self._recolored[0]), max(stop, self._recolored[1])
+        self._recolored = (start, stop)
+
+    # //////////////////////////////////////////////////// DISPLAY /////////////////////////////////////////////////////
+
+    def render(self, fb_size: tuple[int, int], count: int | None = None) -> None:
+        count = len(self) if count is None else min(count, len(self))
+        if count == 0:
+            return
+
+        self._program['fb_size'].write(glm.vec2(fb_size))
+        self._program['palette'].write(self._palette.tobytes())
+        self._program['distance_field'].value = self.sdf
+        for i, page in enumerate(self._pages):
+            page.use()
+            self._program['page'].write(glm.vec1(i))
+            self._vao.render(mgl.TRIANGLE_STRIP, vertices=4, instances=count)
+
+    def render_bbox(self, fb_size: tuple[int, int], count: int | None = None) -> None:
+        """
+            outlines the rects of the chars, all pages in one call
+        """
+        count = len(self) if count is None else min(count, len(self))
+        if count == 0:
+            return
+
+        program = ProgramManager(self.ctx).get('char_bbox')
+        if self._bbox_vao is None:
+            # in_uv_rect and in_page are skipped
+            self._bbox_vao = self.ctx.vertex_array(program,
+                                                   [
+                                                       (BufferManager(self.ctx).get('UV'), '2f /v', 'in_texture_cords'),
+                                                       (self._geometry_buffer, '4f 20x /i', 'in_rect')
+                                                   ])
+
+        program['fb_size'].write(glm.vec2(fb_size))
+        self._bbox_vao.render(mgl.TRIANGLE_STRIP, vertices=4, instances=count)
+
+    def release(self) -> None:
+        if self._bbox_vao is not None:
+            self._bbox_vao.release()
+        self._vao.release()
+        self._geometry_buffer.release()
+        self._color_buffer.release()
+        self._state_buffer.release()
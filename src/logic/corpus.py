@@ -0,0 +1,145 @@
+import csv
+import mmap
+import os
+import sys
+
+import numpy as np
+
+from ..settings import BASE_DIR
+
+# FILE LAYOUT
+#   header:  magic (4s) | words count (u4) | string pool size (u4) | reserved (u4)
+#   offsets: u4[count + 1]  - word i is pool[offsets[i]:offsets[i + 1]]
+#   weights: f4[count]
+#   pool:    utf-8 bytes of all words one after another
+
+MAGIC = b'TGC1'
+HEADER = np.dtype([('magic', 'S4'), ('count', '<u4'), ('pool_size', '<u4'), ('reserved', '<u4')])
+
+
+def _csv_path(language: str) -> str:
+    return f'{BASE_DIR}/data/words_data/{language}.csv'
+
+
+def _corpus_path(language: str) -> str:
+    return f'{BASE_DIR}/data/words_data/{language}.corpus'
+
+
+def compile_corpus(language: str) -> str:
+    """
+        packs data/words_data/<language>.csv into data/words_data/<language>.corpus
+    """
+    try:
+        with open(_csv_path(language), encoding='utf-8', newline='') as file:
+            rows = [(row['word'], float(row['count'])) for row in csv.DictReader(file, delimiter=';')]
+    except FileNotFoundError:
+        raise NameError(f'No such words data for language name: {language}')
+
+    encoded = [word.encode('utf-8') for word, _ in rows]
+
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    np.cumsum([len(word) for word in encoded], out=offsets[1:])
+    weights = np.array([count for _, count in rows], dtype='<f4')
+    pool = b''.join(encoded)
+
+    header = np.array([(MAGIC, len(encoded), len(pool), 0)], dtype=HEADER)
+
+    path = _corpus_path(language)
+    with open(path + '.tmp', 'wb') as file:
+        file.write(header.tobytes())
+        file.write(offsets.tobytes())
+        file.write(weights.tobytes())
+        file.write(pool)
+    os.replace(path + '.tmp', path)
+
+    return path
+
+
+class Corpus:
+    """
+        read-only view of a compiled corpus file, backed by mmap
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        header = np.frombuffer(self._mmap, dtype=HEADER, count=1)[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f'{path} is not a compiled corpus file')
+
+        count = int(header['count'])
+        pool_size = int(header['pool_size'])
+
+        pos = HEADER.itemsize
+        self._offsets = np.frombuffer(self._mmap, dtype='<u4', count=count + 1, offset=pos)
+        pos += self._offsets.nbytes
+        self._weights = np.frombuffer(self._mmap, dtype='<f4', count=count, offset=pos)
+        pos += self._weights.nbytes
+        self._pool = memoryview(self._mmap)[pos:pos + pool_size]
+
+        self._cum_weights = None
+        self._index: dict[str, int] | None = None
+        self._charset: frozenset[str] | None = None
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    @property
+    def weights(self) -> np.ndarray:
+        return self._weights
+
+    @property
+    def cum_weights(self) -> np.ndarray:
+        # prefix sums of any limit are a prefix of this array, so one copy serves every generator
+        if self._cum_weights is None:
+            self._cum_weights = np.cumsum(self._weights, dtype='float64')
+            self._cum_weights.flags.writeable = False
+
+        return self._cum_weights
+
+    def word(self, i: int) -> str:
+        return bytes(self._pool[self._offsets[i]:self._offsets[i + 1]]).decode('utf-8')
+
+    def words(self, indexes) -> list[str]:
+        return [self.word(i) for i in indexes]
+
+    def charset(self) -> frozenset[str]:
+        if self._charset is None:
+            self._charset = frozenset(bytes(self._pool).decode('utf-8'))
+
+        return self._charset
+
+    def index(self, word: str) -> int | None:
+        if self._index is None:
+            self._index = {self.word(i): i for i in reversed(range(len(self)))}
+
+        return self._index.get(word)
+
+
+_loaded: dict[str, Corpus] = {}
+
+
+def load_corpus(language: str) -> Corpus:
+    """
+        shared Corpus for language; compiles the csv first if the packed file is missing or outdated
+    """
+    if language not in _loaded:
+        path = _corpus_path(language)
+
+        try:
+            csv_mtime = os.path.getmtime(_csv_path(language))
+        except FileNotFoundError:
+            csv_mtime = None
+
+        if not os.path.exists(path) or (csv_mtime is not None and csv_mtime > os.path.getmtime(path)):
+            compile_corpus(language)
+
+        _loaded[language] = Corpus(path)
+
+    return _loaded[language]
+
+
+if __name__ == '__main__':
+    for name in sys.argv[1:] or ['russian']:
+        print(compile_corpus(name))
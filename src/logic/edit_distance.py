@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+
+# longest target handled by the bit-parallel paths, one machine word in the batch version
+WORD_BITS = 64
+
+
+def _peq(pattern: str) -> dict[str, int]:
+    peq = {}
+    for i, c in enumerate(pattern):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    return peq
+
+
+def bit_parallel_distance(target: str, typed: str) -> int:
+    """
+        Levenshtein distance by Myers/Hyyro bit-vector algorithm, O(len(typed)) word operations
+    """
+    m = len(target)
+    if m == 0:
+        return len(typed)
+
+    peq = _peq(target)
+    mask = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+
+    pv = mask
+    mv = 0
+    score = m
+    for c in typed:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+
+    return score
+
+
+def banded_distance(target: str, typed: str, max_distance: int | None = None) -> int:
+    """
+        Levenshtein distance by dynamic programming over the diagonal band |i - j| <= k;
+        without max_distance the band is doubled until it holds the answer
+    """
+    m, n = len(target), len(typed)
+
+    if max_distance is not None:
+        return min(_banded(target, typed, max_distance), max_distance + 1)
+
+    k = max(1, abs(m - n))
+    while True:
+        distance = _banded(target, typed, k)
+        if distance <= k:
+            return distance
+        k *= 2
+
+
+def _banded(target: str, typed: str, k: int) -> int:
+    m, n = len(target), len(typed)
+    if abs(m - n) > k:
+        return k + 1
+
+    inf = k + 1
+    prev = [j if j <= k else inf for j in range(n + 1)]
+    for i in range(1, m + 1):
+        curr = [inf] * (n + 1)
+        if i <= k:
+            curr[0] = i
+
+        for j in range(max(1, i - k), min(n, i + k) + 1):
+            cost = 0 if target[i - 1] == typed[j - 1] else 1
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost, inf)
+
+        prev = curr
+
+    return prev[n]
+
+
+def distance(target: str, typed: str) -> int:
+    if len(target) <= WORD_BITS:
+        return bit_parallel_distance(target, typed)
+
+    return banded_distance(target, typed)
+
+
+def _codes(strings: list[str], width: int) -> np.ndarray:
+    padded = ''.join(s.ljust(width, '\0') for s in strings)
+    return np.frombuffer(padded.encode('utf-32-le'), dtype='<u4').reshape(len(strings), width)
+
+
+def batch_distance(pairs: Iterable[tuple[str, str]]) -> list[int]:
+    """
+        distances for many (target, typed) pairs; targets that fit in a machine word run as lanes
+        of one NumPy bit-vector pass, the rest go through distance()
+    """
+    pairs = list(pairs)
+    result = [0] * len(pairs)
+
+    lanes = [i for i, (target, _) in enumerate(pairs) if 0 < len(target) <= WORD_BITS]
+    for i, (target, typed) in enumerate(pairs):
+        if not 0 < len(target) <= WORD_BITS:
+            result[i] = distance(target, typed)
+
+    if not lanes:
+        return result
+
+    targets = [pairs[i][0] for i in lanes]
+    typed = [pairs[i][1] for i in lanes]
+    target_len = np.array([len(t) for t in targets], dtype='uint64')
+    typed_len = np.array([len(t) for t in typed], dtype='int64')
+    length = int(typed_len.max())
+
+    # characters of both sides as indexes into the batch alphabet, strings padded with '\0'
+    alphabet = np.array(sorted(set(''.join(targets)) | set(''.join(typed)) | {'\0'}), dtype='U1').view('<u4')
+    target_width = int(target_len.max())
+    target_codes = np.searchsorted(alphabet, _codes(targets, target_width))
+    typed_codes = np.searchsorted(alphabet, _codes(typed, length))
+
+    lane_index = np.arange(len(lanes))
+    peq = np.zeros((len(lanes), len(alphabet)), dtype='uint64')
+    for i in range(target_width):
+        bits = np.where(np.uint64(i) < target_len, np.uint64(1 << i), np.uint64(0))
+        np.bitwise_or.at(peq, (lane_index, target_codes[:, i]), bits)
+
+    eq = peq[lane_index[:, None], typed_codes]
+
+    one = np.uint64(1)
+    mask = np.where(target_len == WORD_BITS, ~np.uint64(0), (one << (target_len % WORD_BITS)) - one)
+    high_bit = one << (target_len - one)
+
+    pv = mask.copy()
+    mv = np.zeros(len(lanes), dtype='uint64')
+    score = target_len.astype('int64')
+    for j in range(length):
+        active = j < typed_len
+        e = eq[:, j]
+
+        xv = e | mv
+        xh = (((e & pv) + pv) ^ pv) | e
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+
+        up = (ph & high_bit) != 0
+        down = ~up & ((mh & high_bit) != 0)
+        score += (active & up).astype('int64') - (active & down).astype('int64')
+
+        ph = ((ph << one) | one) & mask
+        mh = (mh << one) & mask
+        pv = np.where(active, mh | (~(xv | ph) & mask), pv)
+        mv = np.where(active, ph & xv, mv)
+
+    for lane, i in enumerate(lanes):
+        result[i] = int(score[lane])
+
+    return result
+
+
+def similarity(target: str, typed: str) -> float:
+    """
+        1 - distance / length of the longer string; 1 for two empty strings
+    """
+    longest = max(len(target), len(typed))
+    if longest == 0:
+        return 1.
+
+    return 1 - distance(target, typed) / longest
@@ -5,9 +5,19 @@ from .mouse import MouseClick, MouseMove, LastPress, DragInfo
 
 
 class EventHandler:
-    def __init__(self, window):
+    # ms without resize events after which a live resize applies the size
+    RESIZE_SETTLE = 150
+
+    def __init__(self, window, live_resize: bool = False):
         self.window = window
 
+        # RESIZE
+        # the size of the last resize event, applied once per frame at most
+        self._pending_size: tuple[int, int] | None = None
+        self._last_resize = 0
+        # the last frame is stretched over the window while it is being resized, the layout follows when it settles
+        self.live_resize = live_resize
+
         # MOUSE
         self.drag_info = DragInfo()
         self.last_press = LastPress()
@@ -23,11 +33,11 @@ class EventHandler:
             # //////////////////////////////////////////////////////////////////////////////////////////////////////////
 
             if event.type == pg.VIDEORESIZE:
-                window.size = pg.display.get_window_size()
-
-                window.ctx.viewport = (0, 0) + window.size
+                self._pending_size = pg.display.get_window_size()
+                self._last_resize = pg.time.get_ticks()
 
-                gui.size = window.size
+                if self.live_resize:
+                    window.ctx.viewport = (0, 0) + self._pending_size
 
             if event.type == pg.WINDOWFOCUSLOST:
                 window.fps = window.out_of_focus_fps
@@ -47,8 +57,10 @@ class EventHandler:
                 if event.dict['key'] == pg.K_F1:
                     gui.toggle_bbox()
 
-                if event.dict['key'] == pg.K_F2:
-                    pass
+                if event.dict['key'] == pg.K_F2 and gui.current_root is not None:
+                    print(gui.current_root.compositor.report())
+                    print(f'layout pass: {gui.current_root.measured} measured, '
+                          f'{gui.current_root.arranged} arranged')
 
                 if event.dict['key'] == pg.K_F11:
                     pg.display.toggle_fullscreen()
@@ -118,3 +130,21 @@ class EventHandler:
 
                 elif if_click_out_of_range and self.last_press.b_name in mouse_move.buttons:
                     self.drag_info = DragInfo(self.last_press.b_name, self.last_press.widget)
+
+    def apply_resize(self):
+        """
+            resizes the gui to the last size asked for, called once a frame after the events
+        """
+        if self._pending_size is None:
+            return
+
+        if self.live_resize and pg.time.get_ticks() - self._last_resize < self.RESIZE_SETTLE:
+            return
+
+        window = self.window
+        window.size = self._pending_size
+        self._pending_size = None
+
+        window.ctx.viewport = (0, 0) + window.size
+
+        window.gui.size = window.size
@@ -1,23 +1,8 @@
-from difflib import ndiff
+from .edit_distance import similarity
 
 
 def levenshtein_distance(str_1, str_2):
     """
         normalized levenshtein distance between to str objects
     """
-    distance = 0
-    buffer_removed = buffer_added = 0
-    for x in ndiff(str_1, str_2):
-        code = x[0]
-
-        if code == ' ':
-            distance += max(buffer_removed, buffer_added)
-            buffer_removed = buffer_added = 0
-        elif code == '-':
-            buffer_removed += 1
-        elif code == '+':
-            buffer_added += 1
-
-    distance += max(buffer_removed, buffer_added)
-
-    return 1 - distance / max(len(str_1), len(str_2))
\ No newline at end of file
+    return similarity(str_1, str_2)
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+from typing import Callable
+
+from .text_generator import TextGenerator
+
+
+class LineQueue:
+    """
+        bounded look-ahead of generated lines, filled by a worker thread for the current width;
+        after a width change the lines made for the old width are handed out, cut to fit, until new ones are ready;
+        when those run out too the last line handed out is cut again, so only the very first pop waits
+    """
+
+    def __init__(self, text_gen: TextGenerator, measure: Callable[[str], int], size: int = 4, batch_size: int = 32):
+        self._text_gen = text_gen
+        self._measure = measure
+        self._size = size
+        self._batch_size = batch_size
+
+        self._lines: deque[str] = deque()
+        # (width, line) made for earlier widths
+        self._stale: deque[tuple[int, str]] = deque(maxlen=size)
+        # (width, line) of the last line handed out, before it was cut
+        self._last: tuple[int, str] | None = None
+        self._width: int | None = None
+        self._generation = 0
+
+        self._cond = threading.Condition()
+        self._gen_lock = threading.Lock()
+        self._running = True
+
+        self._worker = threading.Thread(target=self._work, name='LineQueue', daemon=True)
+        self._worker.start()
+
+    # ///////////////////////////////////////////////////// QUEUE //////////////////////////////////////////////////////
+
+    @property
+    def width(self) -> int | None:
+        return self._width
+
+    def configure(self, width: int) -> None:
+        """
+            keeps the ready lines as stale ones and lets the worker refill the queue for the new width
+        """
+        with self._cond:
+            if width != self._width:
+                self._refill(width)
+
+    def refill(self) -> None:
+        """
+            the weights of the generator changed, the ready lines are kept as stale ones and made again
+        """
+        with self._cond:
+            if self._width is not None:
+                self._refill(self._width)
+
+    def _refill(self, width: int) -> None:
+        self._stale.extend((self._width, line) for line in self._lines)
+        self._width = width
+        self._generation += 1
+        self._lines.clear()
+
+        self._cond.notify_all()
+
+    def pop(self, width: int) -> str:
+        """
+            ready line for width, else a stale line or the last line handed out, cut to width;
+            waits for the worker only for the first line
+        """
+        self.configure(width)
+
+        with self._cond:
+            while self._running and not self._lines and not self._stale and self._last is None:
+                self._cond.wait()
+
+            if self._lines:
+                self._last = (width, self._lines.popleft())
+                self._cond.notify_all()
+            elif self._stale:
+                self._last = self._stale.popleft()
+            elif self._last is None:
+                # stopped before the first line was made
+                self._last = (width, self._build(width))
+
+            line_width, line = self._last
+
+        return line if line_width <= width else cut_line(line, self._measure, width)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    # ///////////////////////////////////////////////////// WORKER /////////////////////////////////////////////////////
+
+    def _work(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and (self._width is None or len(self._lines) >= self._size):
+                    self._cond.wait()
+
+                if not self._running:
+                    return
+
+                width = self._width
+                generation = self._generation
+
+            line = self._build(width)
+
+            with self._cond:
+                if generation != self._generation:
+                    self._stale.append((width, line))
+                elif len(self._lines) < self._size:
+                    self._lines.append(line)
+
+                self._cond.notify_all()
+
+    def _build(self, width: int) -> str:
+        with self._gen_lock:
+            return fit_line(self._text_gen, self._measure, width, self._batch_size)
+
+
+def fit_line(text_gen: TextGenerator, measure: Callable[[str], int], width: int, batch_size: int = 32) -> str:
+    """
+        space separated words that fit in width, measured without touching any widget
+    """
+    words = []
+    pen = 0
+    space_len = measure(' ')
+    while True:
+        for word in text_gen.get_many(batch_size):
+            word_len = measure(word)
+
+            if pen + word_len >= width:
+                return ''.join(w + ' ' for w in words)
+
+            words.append(word)
+            pen += word_len + space_len
+
+
+def cut_line(line: str, measure: Callable[[str], int], width: int) -> str:
+    """
+        leading words of a line made by fit_line that fit in the smaller width
+    """
+    words = []
+    pen = 0
+    space_len = measure(' ')
+    for word in line.split(' ')[:-1]:
+        word_len = measure(word)
+
+        if pen + word_len >= width:
+            break
+
+        words.append(word)
+        pen += word_len + space_len
+
+    return ''.join(w + ' ' for w in words)
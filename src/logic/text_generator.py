@@ -1,23 +1,25 @@
-import pandas as pd
-from random import randint
+import threading
 
-from ..settings import BASE_DIR
+import numpy as np
+
+from .corpus import load_corpus
+from ..misc.fenwick import FenwickTree
 
 
 class TextGenerator:
 
-    def __init__(self, limit: int | None = None, language='russian'):
-        self._prefix_sum = None
+    def __init__(self, limit: int | None = None, language='russian', seed: int | None = None):
+        self._rng = np.random.default_rng(seed)
 
-        self._language = language
-        self._words_df = self._get_words_df(language)
+        # created on the first weight change; until then draws use the corpus' shared prefix sums
+        self._tree: FenwickTree | None = None
+        # weights are changed from the main thread while LineQueue workers sample
+        self._lock = threading.Lock()
 
-        if limit is None:
-            self.limit = len(self._words_df)
-        else:
-            self.limit = limit
+        self._language = language
+        self._corpus = load_corpus(language)
 
-        self._words = self._words_df['word'][:self.limit]
+        self.limit = limit
 
     @property
     def language(self):
@@ -25,16 +27,12 @@ class TextGenerator:
 
     @language.setter
     def language(self, value: str):
-        self._language = value
-
-        self._get_words_df(value)
+        corpus = load_corpus(value)
 
-    @staticmethod
-    def _get_words_df(language):
-        try:
-            return pd.read_csv(f'{BASE_DIR}/data/words_data/{language}.csv', sep=';')
-        except FileNotFoundError:
-            raise NameError(f'No such words data for language name: {language}')
+        with self._lock:
+            self._language = value
+            self._corpus = corpus
+        self.limit = None
 
     @property
     def limit(self):
@@ -42,46 +40,73 @@ class TextGenerator:
 
     @limit.setter
     def limit(self, value: int | None):
-        if value is None:
-            self._limit = len(self._words_df)
-        else:
-            self._limit = value
-
-        self._calc_prefix_sum()
-        self._words = self._words_df['word'][:value]
-
-    def _calc_prefix_sum(self) -> None:
-        weights = self._words_df['count']
-        self._prefix_sum = [0 for _ in range(self.limit)]
-
-        temp = 0
-        i = 0
-        while i != self.limit:
-            temp += weights[i]
-            self._prefix_sum[i] = temp
-            i += 1
-
-    @staticmethod
-    def _binary_search(value: float, lst: list):
-        left_i = 0
-        right_i = len(lst) - 1
-
-        while left_i < right_i:
-            probe = (right_i + left_i) // 2
-
-            if lst[probe] < value:
-                left_i = probe + 1
-            elif lst[probe] > value:
-                right_i = probe - 1
+        with self._lock:
+            if value is None:
+                self._limit = len(self._corpus)
             else:
-                return probe
+                self._limit = min(value, len(self._corpus))
+
+            self._cum_weights = self._corpus.cum_weights[:self._limit]
+            self._tree = None
+
+    def seed(self, value: int | None) -> None:
+        with self._lock:
+            self._rng = np.random.default_rng(value)
+
+    # //////////////////////////////////////////////////// WEIGHTS /////////////////////////////////////////////////////
+
+    def _get_tree(self) -> FenwickTree:
+        if self._tree is None:
+            self._tree = FenwickTree(self._corpus.weights[:self._limit])
 
-        if left_i != right_i:
-            return probe
-        else:
-            return left_i if lst[left_i] >= value else left_i + 1
+        return self._tree
+
+    def _weight(self, i: int) -> float:
+        return self._tree[i] if self._tree is not None else float(self._corpus.weights[i])
+
+    def _index(self, word: str) -> int | None:
+        i = self._corpus.index(word)
+        return None if i is None or i >= self._limit else i
+
+    def get_weight(self, word: str) -> float | None:
+        with self._lock:
+            i = self._index(word)
+            return None if i is None else self._weight(i)
+
+    def set_weight(self, word: str, weight: float) -> None:
+        with self._lock:
+            i = self._index(word)
+            if i is not None:
+                self._get_tree()[i] = weight
+
+    def boost(self, word: str, factor: float) -> None:
+        """
+            multiplies the weight of word; words outside the limit are ignored
+        """
+        with self._lock:
+            i = self._index(word)
+            if i is not None:
+                self._get_tree()[i] = self._weight(i) * factor
+
+    def reset_weights(self) -> None:
+        with self._lock:
+            self._tree = None
+
+    # //////////////////////////////////////////////////// SAMPLING ////////////////////////////////////////////////////
 
     def get(self) -> str:
-        rand_int = randint(int(self._prefix_sum[0]), int(self._prefix_sum[-1]))
+        return self.get_many(1)[0]
+
+    def get_many(self, n: int) -> list[str]:
+        """
+            n words drawn by weight in one vectorized pass
+        """
+        with self._lock:
+            tree = self._tree
+            if tree is None:
+                rand = self._rng.random(n) * self._cum_weights[-1]
+                indexes = np.minimum(np.searchsorted(self._cum_weights, rand, side='right'), self._limit - 1)
+            else:
+                indexes = tree.find_many(self._rng.random(n) * tree.total)
 
-        return self._words[self._binary_search(rand_int, self._prefix_sum)]
+            return self._corpus.words(indexes)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+
+class WordMatcher:
+    """
+        keeps the typed text matched against one target word, updated one keystroke at a time:
+        matched prefix and first error in O(1), edit distance row in O(len(target))
+    """
+
+    def __init__(self, target: str):
+        self._target = target
+        self._typed = ''
+
+        self._first_error: int | None = None
+        # edit distance rows between target and every prefix of typed, popped on backspace
+        self._rows: list[list[int]] = [list(range(len(target) + 1))]
+
+    # ////////////////////////////////////////////////// PROPERTIES ////////////////////////////////////////////////////
+
+    @property
+    def target(self) -> str:
+        return self._target
+
+    @property
+    def typed(self) -> str:
+        return self._typed
+
+    @property
+    def first_error(self) -> int | None:
+        return self._first_error
+
+    @property
+    def matched(self) -> int:
+        return len(self._typed) if self._first_error is None else self._first_error
+
+    @property
+    def is_prefix(self) -> bool:
+        return self._first_error is None
+
+    @property
+    def distance(self) -> int:
+        return self._rows[-1][-1]
+
+    @property
+    def similarity(self) -> float:
+        longest = max(len(self._target), len(self._typed))
+        if longest == 0:
+            return 1.
+
+        return 1 - self.distance / longest
+
+    # //////////////////////////////////////////////////// UPDATE //////////////////////////////////////////////////////
+
+    def push(self, char: str) -> None:
+        i = len(self._typed)
+        if self._first_error is None and (i >= len(self._target) or self._target[i] != char):
+            self._first_error = i
+
+        self._typed += char
+
+        prev = self._rows[-1]
+        row = [prev[0] + 1]
+        for j, target_char in enumerate(self._target, 1):
+            row.append(min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + (target_char != char)))
+        self._rows.append(row)
+
+    def pop(self) -> None:
+        if not self._typed:
+            return
+
+        self._typed = self._typed[:-1]
+        self._rows.pop()
+
+        if self._first_error is not None and self._first_error >= len(self._typed):
+            self._first_error = None
+
+    def sync(self, typed: str) -> None:
+        """
+            brings the state to typed, redoing only what differs from the current text
+        """
+        common = 0
+        for a, b in zip(self._typed, typed):
+            if a != b:
+                break
+            common += 1
+
+        while len(self._typed) > common:
+            self.pop()
+
+        for char in typed[common:]:
+            self.push(char)
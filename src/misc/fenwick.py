@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import numpy as np
+
+
+class FenwickTree:
+    """
+        binary indexed tree over float weights: O(log n) point updates, prefix sums and weighted search
+    """
+
+    def __init__(self, weights: np.ndarray) -> None:
+        self._n = len(weights)
+
+        # tree[i] (1-based) holds the sum of the (i & -i) weights ending at i
+        cum = np.zeros(self._n + 1, dtype='float64')
+        np.cumsum(weights, out=cum[1:])
+
+        i = np.arange(1, self._n + 1)
+        self._tree = np.zeros(self._n + 1, dtype='float64')
+        self._tree[1:] = cum[i] - cum[i - (i & -i)]
+
+        self._weights = np.array(weights, dtype='float64')
+
+        self._top_step = 1 << (self._n.bit_length() - 1) if self._n else 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, i: int) -> float:
+        return float(self._weights[i])
+
+    def __setitem__(self, i: int, value: float) -> None:
+        self.add(i, value - self._weights[i])
+
+    @property
+    def total(self) -> float:
+        return self.prefix_sum(self._n)
+
+    def add(self, i: int, delta: float) -> None:
+        self._weights[i] += delta
+
+        i += 1
+        while i <= self._n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> float:
+        """
+            sum of the first count weights
+        """
+        result = 0.
+        while count > 0:
+            result += self._tree[count]
+            count -= count & -count
+
+        return float(result)
+
+    def find(self, value: float) -> int:
+        return int(self.find_many(np.array([value]))[0])
+
+    def find_many(self, values: np.ndarray) -> np.ndarray:
+        """
+            for every value, the index i with prefix_sum(i) <= value < prefix_sum(i + 1);
+            one tree descent shared by all values
+        """
+        pos = np.zeros(len(values), dtype='int64')
+        rem = np.array(values, dtype='float64')
+
+        step = self._top_step
+        while step:
+            nxt = pos + step
+            fits = nxt <= self._n
+            fits[fits] = self._tree[nxt[fits]] <= rem[fits]
+
+            pos[fits] = nxt[fits]
+            rem[fits] -= self._tree[nxt[fits]]
+
+            step >>= 1
+
+        return np.minimum(pos, self._n - 1)
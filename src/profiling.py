@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import importlib.abc
+import sys
+import time
+from dataclasses import dataclass
+
+
+@dataclass
+class _ImportRecord:
+    name: str
+    depth: int
+    self_us: int = 0
+    cumulative_us: int = 0
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, profiler: StartupProfiler, loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit()
+
+    def __getattr__(self, item):
+        return getattr(self._loader, item)
+
+
+class StartupProfiler(importlib.abc.MetaPathFinder):
+    """
+        python -X importtime style report of the imports made while it is running,
+        plus the time from start() to the first drawn frame
+    """
+
+    def __init__(self, budget_ms: int):
+        self.budget_ms = budget_ms
+
+        self._records: list[_ImportRecord] = []
+        self._stack: list[tuple[_ImportRecord, int, int]] = []
+
+        self._start = 0
+        self._first_frame_ms: float | None = None
+
+    # ///////////////////////////////////////////////////// HOOK ///////////////////////////////////////////////////////
+
+    def start(self) -> None:
+        self._start = time.perf_counter_ns()
+        sys.meta_path.insert(0, self)
+
+    def stop(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+
+        return None
+
+    def _enter(self, name: str) -> None:
+        record = _ImportRecord(name, len(self._stack))
+        self._records.append(record)
+        self._stack.append((record, time.perf_counter_ns(), 0))
+
+    def _exit(self) -> None:
+        record, start, children_us = self._stack.pop()
+        record.cumulative_us = (time.perf_counter_ns() - start) // 1000
+        record.self_us = record.cumulative_us - children_us
+
+        if self._stack:
+            parent, parent_start, parent_children_us = self._stack[-1]
+            self._stack[-1] = (parent, parent_start, parent_children_us + record.cumulative_us)
+
+    # //////////////////////////////////////////////////// REPORT //////////////////////////////////////////////////////
+
+    def first_frame(self) -> None:
+        if self._first_frame_ms is None:
+            self._first_frame_ms = (time.perf_counter_ns() - self._start) / 1_000_000
+            self.stop()
+
+    def report(self, top: int = 25) -> str:
+        lines = ['import time: self [us] | cumulative | imported package']
+        for record in sorted(self._records, key=lambda r: r.cumulative_us, reverse=True)[:top]:
+            lines.append(f'import time: {record.self_us:>9} | {record.cumulative_us:>10} | '
+                         f'{"  " * record.depth}{record.name}')
+
+        imports_ms = sum(r.cumulative_us for r in self._records if r.depth == 0) / 1000
+        lines.append(f'imports: {imports_ms:.1f} ms')
+
+        if self._first_frame_ms is not None:
+            status = 'OK' if self._first_frame_ms <= self.budget_ms else 'OVER BUDGET'
+            lines.append(f'first frame: {self._first_frame_ms:.1f} ms (budget {self.budget_ms} ms) {status}')
+
+        return '\n'.join(lines)
@@ -10,11 +10,42 @@ W_SIZE = (1200, 720)
 
 FPS = 144
 
+# stretch the last frame while the window is being resized, instead of laying it out every frame
+LIVE_RESIZE = False
+
+# GAME
+
+# weight multiplier for mistyped words in the generated lines, None keeps the corpus weights
+MISTAKE_BOOST: float | None = None
+
+# STARTUP
+
+STARTUP_BUDGET_MS = 500
+
 # MONITOR
 
-from screeninfo import get_monitors
+# used for fonts when the dpi of the primary monitor is unknown
+DEFAULT_DPI = 96
+
+_monitor_dpi: float | None = None
+
+
+def get_monitor_dpi() -> float:
+    # screeninfo is slow to import and query, so it is only touched when the first Font needs it
+    global _monitor_dpi
+
+    if _monitor_dpi is None:
+        from screeninfo import get_monitors
+
+        _monitor_dpi = -1
+        for m in get_monitors():
+            if m.is_primary:
+                _monitor_dpi = m.width / m.width_mm * 25.4
+
+    return _monitor_dpi
+
 
-MONITOR_DPI = -1
-for m in get_monitors():
-    if m.is_primary:
-        MONITOR_DPI = m.width / m.width_mm * 25.4
+def __getattr__(name):
+    if name == 'MONITOR_DPI':
+        return get_monitor_dpi()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
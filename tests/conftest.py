@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# the game runs from the repository root, BASE_DIR and the imports of src depend on it
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """
+        a fresh glyph cache file per test, the singleton is made again
+    """
+    from src.interface.misc import glyph_cache
+
+    monkeypatch.setattr(glyph_cache, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(glyph_cache.GlyphCache, '_instance', None)
+
+    return glyph_cache.GlyphCache()
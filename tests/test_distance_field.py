@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from src.interface.widgets import text_render
+from src.interface.widgets.text_render import DistanceField, Font, Glyph
+
+# FreeType puts the edge of a distance field at 128, like half coverage of a bitmap
+EDGE = 128
+# share of the union of both shapes they must have in common
+MIN_OVERLAP = 0.93
+
+# text drawn with sdf fonts by the logo and results screens
+SDF_TEXT = {
+    'Inkfree': 'TypingGame' + 'Результат' + 'Нажатия' + 'Точность' + 'Слова В Минуту',
+}
+
+
+@pytest.fixture(autouse=True)
+def fonts(cache, monkeypatch):
+    monkeypatch.setattr(text_render, 'get_monitor_dpi', lambda: 96)
+    monkeypatch.setattr(DistanceField, '_fields', {})
+
+
+def coverage(glyph: Glyph, origin: tuple[int, int], shape: tuple[int, int]) -> np.ndarray:
+    """
+        pixels inside the glyph, placed by its offset in a canvas shared with other glyphs
+    """
+    canvas = np.zeros(shape, dtype=bool)
+    width, rows = glyph.size
+    if width and rows:
+        x = int(glyph.offset[0]) - origin[0]
+        y = origin[1] - int(glyph.offset[1] + rows)
+        canvas[y:y + rows, x:x + width] = glyph.bitmap.reshape(rows, width) >= EDGE
+
+    return canvas
+
+
+def overlap(name: str, symbol: str) -> float:
+    field = DistanceField.get(name).get_glyph(ord(symbol))
+    bitmap = Font(name, DistanceField.SIZE).get_glyph(ord(symbol))
+
+    glyphs = (field, bitmap)
+    left = min(int(g.offset[0]) for g in glyphs)
+    top = max(int(g.offset[1] + g.size[1]) for g in glyphs)
+    shape = (top - min(int(g.offset[1]) for g in glyphs), max(int(g.offset[0] + g.size[0]) for g in glyphs) - left)
+
+    a, b = (coverage(g, (left, top), shape) for g in glyphs)
+    union = (a | b).sum()
+    return (a & b).sum() / union if union else 1.0
+
+
+@pytest.mark.parametrize('name, symbol', [(name, symbol) for name, text in SDF_TEXT.items()
+                                          for symbol in sorted(set(text + '0123456789') - {' '})])
+def test_sdf_glyph_matches_bitmap(name, symbol):
+    assert overlap(name, symbol) >= MIN_OVERLAP
+
+
+def test_overlapping_contours_break_the_field():
+    # why CascadiaMono stays on bitmaps: its '1' and 'д' lose a part of their shape
+    assert min(overlap('CascadiaMono', symbol) for symbol in '1д') < MIN_OVERLAP
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.interface.misc.glyph_cache import GlyphCache, GlyphData
+from src.interface.widgets import text_render
+from src.interface.widgets.text_render import Font
+
+
+def glyph_data(width: int, rows: int) -> GlyphData:
+    bitmap = np.arange(width * rows, dtype='u1')
+    return GlyphData(bitmap, (width, rows), (1, -2), width + 1, rows + 1)
+
+
+@pytest.mark.parametrize('dpi', [-1, 0, 96])
+def test_append_and_reload_any_dpi(cache, monkeypatch, dpi):
+    key = (b'fonthash', 30, dpi)
+    cache.append(key, ord('a'), glyph_data(3, 4))
+
+    data = cache.get(key, ord('a'))
+    assert data.size == (3, 4)
+    assert data.offset == (1, -2)
+    assert np.array_equal(data.bitmap, np.arange(12, dtype='u1'))
+
+    # read back from the file by a new cache
+    monkeypatch.setattr(GlyphCache, '_instance', None)
+    reloaded = GlyphCache().get(key, ord('a'))
+    assert np.array_equal(reloaded.bitmap, data.bitmap)
+
+
+def test_font_with_unknown_dpi(cache, monkeypatch):
+    # get_monitor_dpi gives -1 when there is no primary monitor
+    monkeypatch.setattr(text_render, 'get_monitor_dpi', lambda: -1)
+
+    font = Font('CascadiaMono', 30)
+    glyph = font.get_glyph(ord('a'))
+
+    assert font._cache_key[2] == text_render.DEFAULT_DPI
+    assert glyph.size[0] > 0 and glyph.size[1] > 0
+    assert cache.get(font._cache_key, ord('a')) is not None
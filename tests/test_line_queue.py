@@ -0,0 +1,70 @@
+import time
+
+from src.logic.line_queue import LineQueue, cut_line, fit_line
+
+WORDS = ('a', 'bb', 'ccc', 'dddd', 'eeeee')
+
+
+class SlowGenerator:
+    """
+        words in a fixed cycle, every batch takes DELAY seconds like a large corpus on a slow machine
+    """
+    DELAY = 0.05
+
+    def __init__(self):
+        self._i = 0
+
+    def get_many(self, n: int) -> list[str]:
+        time.sleep(self.DELAY)
+
+        words = [WORDS[(self._i + k) % len(WORDS)] for k in range(n)]
+        self._i += n
+        return words
+
+
+def fits(line: str, width: int) -> bool:
+    return all(len(word) < width for word in line.split())
+
+
+def test_cut_line_matches_fit_line():
+    line = fit_line(SlowGenerator(), len, 60, batch_size=8)
+
+    for width in range(1, 60):
+        cut = cut_line(line, len, width)
+        assert line.startswith(cut)
+        assert sum(len(word) + 1 for word in cut.split()) - 1 < width or cut == ''
+
+
+def test_pop_never_waits_while_resizing():
+    queue = LineQueue(SlowGenerator(), len, size=4, batch_size=8)
+    try:
+        queue.pop(80)
+
+        # a resize being dragged: a new width every frame, two lines popped for each like MainScreen.reset_game
+        for width in range(79, 40, -3):
+            queue.configure(width)
+            for _ in range(2):
+                start = time.perf_counter()
+                line = queue.pop(width)
+                elapsed = time.perf_counter() - start
+
+                assert elapsed < SlowGenerator.DELAY / 5
+                assert line and fits(line, width)
+    finally:
+        queue.stop()
+
+
+def test_pop_gives_lines_for_the_new_width_once_ready():
+    queue = LineQueue(SlowGenerator(), len, size=4, batch_size=8)
+    try:
+        queue.pop(80)
+        queue.configure(40)
+
+        deadline = time.perf_counter() + 5
+        while len(queue._lines) < 4 and time.perf_counter() < deadline:
+            time.sleep(SlowGenerator.DELAY)
+
+        assert len(queue._lines) == 4
+        assert fits(queue.pop(40), 40)
+    finally:
+        queue.stop()